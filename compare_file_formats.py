@@ -1,13 +1,118 @@
 #!/usr/bin/env python3
 """Compare claims between fixed-width format and EDI 837 format files."""
 
+import functools
+import hashlib
+import heapq
+import mmap
+import os
+import pickle
 import re
 import sys
+import tempfile
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Set, Tuple
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
 
+# On-disk cache of parse results. Bump PARSE_CACHE_VERSION whenever a
+# parser's output changes so stale entries are ignored.
+CACHE_DIR = Path.home() / ".cache" / "script_logic_edi"
+PARSE_CACHE_VERSION = 2
+
+
+def _intern_keys(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-intern the claim-number keys of a parse result, in place.
+
+    The parsers intern claim numbers so both files' dicts share one string
+    per claim, but unpickled strings are not interned.
+    """
+    interned = {sys.intern(claim_num): claim for claim_num, claim in claims.items()}
+    claims.clear()
+    claims.update(interned)
+    return claims
+
+
+def cached_parse(parser):
+    """Memoise a file parser on disk, keyed on the file's path, mtime and size.
+
+    Reruns against unchanged input files load the pickled result instead
+    of parsing again, with its claim-number keys re-interned. Any cache
+    read/write failure falls back to parsing.
+    """
+    @functools.wraps(parser)
+    def wrapper(file_path: str):
+        stat = os.stat(file_path)
+        key = repr((
+            PARSE_CACHE_VERSION,
+            parser.__name__,
+            os.path.abspath(file_path),
+            stat.st_mtime_ns,
+            stat.st_size
+        ))
+        cache_file = CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.pkl"
+
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            # Missing or corrupt entry; a damaged pickle can raise almost
+            # anything, so treat every failure as a miss
+            pass
+        else:
+            return _intern_keys(cached)
+
+        result = parser(file_path)
+
+        # Write under a unique temp name so concurrent runs on the same
+        # input never write the same file, then rename into place
+        temp_path = None
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix='.tmp', delete=False) as f:
+                temp_path = f.name
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_file)
+        except OSError:
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+
+        return result
+
+    return wrapper
+
+
+# Fixed-width column layouts (start, end). A single itemgetter over these
+# slices pulls every field out of a record in one C-level call; fields
+# past the end of a short record slice to empty strings, so no per-field
+# length checks are needed.
+HEADER_COLUMNS = {
+    'claim_number': (236, 249),
+    'last_name': (92, 132),
+    'first_name': (132, 192),
+    'billing_date': (82, 92),
+    'dob': (390, 400),
+    'doi': (420, 430),
+}
+
+DETAIL_COLUMNS = {
+    'rx_number': (1, 11),
+    'prescriber_last': (52, 82),
+    'prescriber_first': (82, 112),
+    'quantity': (112, 120),
+    'days_supply': (47, 52),
+    'amount': (120, 132),
+}
+
+_header_fields = itemgetter(*(slice(start, end) for start, end in HEADER_COLUMNS.values()))
+_detail_fields = itemgetter(*(slice(start, end) for start, end in DETAIL_COLUMNS.values()))
+
+
+@cached_parse
 def parse_fixed_width_file(file_path: str) -> Dict[str, List[Dict]]:
     """Parse the fixed-width format file and extract claim information.
 
@@ -17,27 +122,31 @@ def parse_fixed_width_file(file_path: str) -> Dict[str, List[Dict]]:
     current_claim = None
 
     with open(file_path, 'r') as f:
-        for line in f:
-            line = line.rstrip('\n')
-            if not line:
-                continue
-
-            # Header line starts with 'H'
-            if line.startswith('H'):
-                # Extract claim number (found at position 236, extends to 248)
-                claim_num_start = 236
-                claim_num = line[claim_num_start:claim_num_start+13].strip()
-
-                # Extract patient name
-                last_name = line[92:132].strip() if len(line) > 132 else ''
-                first_name = line[132:192].strip() if len(line) > 192 else ''
-
-                # Extract dates
-                billing_date = line[82:92].strip() if len(line) > 92 else ''
-                dob = line[390:400].strip() if len(line) > 400 else ''
-                doi = line[420:430].strip() if len(line) > 430 else ''
-
-                current_claim = {
+        lines = f.read().split('\n')
+
+    # Bind hot globals to locals so the per-record loop uses fast lookups
+    header_fields = _header_fields
+    detail_fields = _detail_fields
+    strip = str.strip
+    intern = sys.intern
+
+    for line in lines:
+        if not line:
+            continue
+
+        # Header line starts with 'H'
+        if line[0] == 'H':
+            claim_num, last_name, first_name, billing_date, dob, doi = map(
+                strip, header_fields(line)
+            )
+            # Share one string object per claim number across both parsers
+            claim_num = intern(claim_num)
+
+            # Register the claim once; repeated headers for the same claim
+            # number keep accumulating line items on the first record
+            current_claim = claims.get(claim_num)
+            if current_claim is None:
+                current_claim = claims[claim_num] = {
                     'claim_number': claim_num,
                     'patient_name': f"{last_name}, {first_name}",
                     'billing_date': billing_date,
@@ -46,110 +155,182 @@ def parse_fixed_width_file(file_path: str) -> Dict[str, List[Dict]]:
                     'line_items': []
                 }
 
-            # Detail line starts with 'D'
-            elif line.startswith('D') and current_claim:
-                # Extract prescription details
-                rx_num = line[1:11].strip()
+        # Detail line starts with 'D'
+        elif line[0] == 'D' and current_claim:
+            rx_num, prescriber_last, prescriber_first, quantity, days_supply, amount = map(
+                strip, detail_fields(line)
+            )
 
-                # Extract prescriber name
-                prescriber_last = line[52:82].strip()
-                prescriber_first = line[82:112].strip()
+            detail = {
+                'rx_number': rx_num,
+                'prescriber': f"{prescriber_last}, {prescriber_first}",
+                'quantity': quantity,
+                'days_supply': days_supply,
+                'amount': amount
+            }
 
-                # Extract quantity and days supply
-                quantity = line[112:120].strip() if len(line) > 120 else ''
-                days_supply = line[47:52].strip() if len(line) > 52 else ''
+            current_claim['line_items'].append(detail)
 
-                # Extract amount
-                amount = line[120:132].strip() if len(line) > 132 else ''
-
-                detail = {
-                    'rx_number': rx_num,
-                    'prescriber': f"{prescriber_last}, {prescriber_first}",
-                    'quantity': quantity,
-                    'days_supply': days_supply,
-                    'amount': amount
-                }
+    return claims
 
-                current_claim['line_items'].append(detail)
 
-                # Store/update the claim
-                if current_claim['claim_number'] not in claims:
-                    claims[current_claim['claim_number']] = current_claim
-                else:
-                    # Update existing claim with new line item
-                    claims[current_claim['claim_number']]['line_items'].append(detail)
+def iter_segments(buffer: bytes) -> Iterator[bytes]:
+    """Yield EDI segments by scanning for terminators.
 
-    return claims
+    Works on any bytes-like buffer (including an mmap) and walks it with
+    find, a memchr-style scan, so the file is never copied into an
+    intermediate list of segments.
+    """
+    find = buffer.find
+    start = 0
+    while True:
+        end = find(b'~', start)
+        if end < 0:
+            yield buffer[start:]
+            return
+        yield buffer[start:end]
+        start = end + 1
+
+
+def _handle_nm1(segment: str, state: Dict) -> None:
+    """Record the patient name from NM1*QC."""
+    if segment[3:6] == '*QC':
+        parts = segment.split('*')
+        if len(parts) > 4:
+            state['current_patient'] = f"{parts[3]}, {parts[4]}"
+
+
+def _handle_ref(segment: str, state: Dict) -> None:
+    """Start a claim on REF*Y4; attach the prescription number on REF*XZ."""
+    qualifier = segment[3:6]
+
+    # Claim number reference
+    if qualifier == '*Y4':
+        parts = segment.split('*')
+        if len(parts) > 1:
+            claim_number = sys.intern(parts[2])
+            current_claim = {
+                'claim_number': claim_number,
+                'patient_name': state['current_patient'],
+                'line_items': [],
+                'total_amount': 0
+            }
+            state['claims'][claim_number] = current_claim
+            state['current_claim'] = current_claim
+
+    # Prescription number
+    elif qualifier == '*XZ':
+        current_claim = state['current_claim']
+        if current_claim and current_claim['line_items']:
+            parts = segment.split('*')
+            if len(parts) > 2:
+                current_claim['line_items'][-1]['rx_number'] = parts[2]
 
 
+def _handle_clm(segment: str, state: Dict) -> None:
+    """Record the claim amount."""
+    current_claim = state['current_claim']
+    if not current_claim:
+        return
+
+    parts = segment.split('*')
+    if len(parts) > 2:
+        try:
+            current_claim['total_amount'] = float(parts[2])
+        except ValueError:
+            print(
+                f"Warning: invalid CLM amount {parts[2]!r} for claim "
+                f"{current_claim['claim_number']}",
+                file=sys.stderr
+            )
+
+
+def _handle_sv1(segment: str, state: Dict) -> None:
+    """Add a service line with amount and quantity."""
+    current_claim = state['current_claim']
+    if not current_claim:
+        return
+
+    parts = segment.split('*')
+    if len(parts) > 5:
+        line_item = {
+            'amount': parts[2] if len(parts) > 2 else '',
+            'quantity': parts[5] if len(parts) > 5 else ''
+        }
+        current_claim['line_items'].append(line_item)
+
+
+def _handle_lin(segment: str, state: Dict) -> None:
+    """Attach the NDC code to the latest service line."""
+    current_claim = state['current_claim']
+    if not current_claim or not current_claim['line_items']:
+        return
+
+    parts = segment.split('*')
+    if len(parts) > 3 and parts[2] == 'N4':
+        current_claim['line_items'][-1]['ndc'] = parts[3]
+
+
+# Segment handlers keyed on the three-character segment ID
+_SEGMENT_HANDLERS = {
+    b'NM1': _handle_nm1,
+    b'REF': _handle_ref,
+    b'CLM': _handle_clm,
+    b'SV1': _handle_sv1,
+    b'LIN': _handle_lin,
+}
+
+
+@cached_parse
 def parse_edi_file(file_path: str) -> Dict[str, Dict]:
     """Parse EDI 837 file and extract claim information.
 
     Returns a dictionary with claim_number as key and claim data as value.
     """
-    claims = {}
+    state = {
+        'claims': {},
+        'current_claim': None,
+        'current_patient': None
+    }
 
-    with open(file_path, 'r') as f:
-        content = f.read()
+    if os.path.getsize(file_path) == 0:
+        return state['claims']
 
-    segments = content.split('~')
+    get_handler = _SEGMENT_HANDLERS.get
 
-    current_claim = None
-    current_patient = None
+    # Map the file and only decode the segments that have a handler
+    with open(file_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for segment in iter_segments(mm):
+            handler = get_handler(segment[:3])
+            if handler:
+                handler(segment.decode(), state)
 
-    for i, segment in enumerate(segments):
-        # Patient name
-        if segment.startswith('NM1*QC'):
-            parts = segment.split('*')
-            if len(parts) > 4:
-                current_patient = f"{parts[3]}, {parts[4]}"
+    return state['claims']
 
-        # Claim number reference
-        elif segment.startswith('REF*Y4'):
-            parts = segment.split('*')
-            if len(parts) > 1:
-                claim_number = parts[2]
-                current_claim = {
-                    'claim_number': claim_number,
-                    'patient_name': current_patient,
-                    'line_items': [],
-                    'total_amount': 0
-                }
-                claims[claim_number] = current_claim
 
-        # Claim amount
-        elif segment.startswith('CLM') and current_claim:
-            parts = segment.split('*')
-            if len(parts) > 2:
-                try:
-                    current_claim['total_amount'] = float(parts[2])
-                except:
-                    pass
+def join_matching_claims(
+    fixed_claims: Dict[str, Dict],
+    edi_claims: Dict[str, Dict],
+    claim_nums
+) -> List[Tuple[str, str, str, int, int]]:
+    """Join claims present in both files into flat comparison rows.
 
-        # Service line with NDC/prescription info
-        elif segment.startswith('SV1') and current_claim:
-            parts = segment.split('*')
-            if len(parts) > 5:
-                # Extract amount and quantity
-                line_item = {
-                    'amount': parts[2] if len(parts) > 2 else '',
-                    'quantity': parts[5] if len(parts) > 5 else ''
-                }
-                current_claim['line_items'].append(line_item)
-
-        # NDC code
-        elif segment.startswith('LIN') and current_claim and current_claim['line_items']:
-            parts = segment.split('*')
-            if len(parts) > 3 and parts[2] == 'N4':
-                current_claim['line_items'][-1]['ndc'] = parts[3]
-
-        # Prescription number
-        elif segment.startswith('REF*XZ') and current_claim and current_claim['line_items']:
-            parts = segment.split('*')
-            if len(parts) > 2:
-                current_claim['line_items'][-1]['rx_number'] = parts[2]
-
-    return claims
+    Returns one (claim_number, fixed_patient, edi_patient,
+    fixed_line_items, edi_line_items) tuple per claim number.
+    """
+    rows = []
+    for claim_num in claim_nums:
+        fixed_claim = fixed_claims[claim_num]
+        edi_claim = edi_claims[claim_num]
+        rows.append((
+            claim_num,
+            fixed_claim.get('patient_name', 'N/A'),
+            edi_claim.get('patient_name', 'N/A'),
+            len(fixed_claim.get('line_items', [])),
+            len(edi_claim.get('line_items', []))
+        ))
+    return rows
 
 
 def compare_files(fixed_width_path: str, edi_path: str):
@@ -166,9 +347,10 @@ def compare_files(fixed_width_path: str, edi_path: str):
     print(f"Parsing EDI 837 file: {edi_path}")
     edi_claims = parse_edi_file(edi_path)
 
-    # Get claim numbers from both files
-    fixed_claim_nums = set(fixed_claims.keys())
-    edi_claim_nums = set(edi_claims.keys())
+    # Claim numbers from both files; key views support set operations
+    # directly, so no intermediate sets are built
+    fixed_claim_nums = fixed_claims.keys()
+    edi_claim_nums = edi_claims.keys()
 
     print(f"\nFixed-width file claims: {len(fixed_claim_nums)}")
     print(f"EDI 837 file claims: {len(edi_claim_nums)}")
@@ -182,21 +364,21 @@ def compare_files(fixed_width_path: str, edi_path: str):
     print(f"Only in fixed-width: {len(only_in_fixed)}")
     print(f"Only in EDI 837: {len(only_in_edi)}")
 
+    # Join the matching claims once so reports read flat rows
+    joined = join_matching_claims(fixed_claims, edi_claims, matching_claims)
+
     # Show sample of matching claims
     if matching_claims:
         print("\n" + "=" * 80)
         print("SAMPLE MATCHING CLAIMS (first 5):")
         print("=" * 80)
 
-        for claim_num in sorted(matching_claims)[:5]:
-            fixed_claim = fixed_claims[claim_num]
-            edi_claim = edi_claims[claim_num]
-
+        for claim_num, fixed_patient, edi_patient, fixed_items, edi_items in heapq.nsmallest(5, joined):
             print(f"\nClaim Number: {claim_num}")
-            print(f"  Fixed-width patient: {fixed_claim.get('patient_name', 'N/A')}")
-            print(f"  EDI patient: {edi_claim.get('patient_name', 'N/A')}")
-            print(f"  Fixed-width line items: {len(fixed_claim.get('line_items', []))}")
-            print(f"  EDI line items: {len(edi_claim.get('line_items', []))}")
+            print(f"  Fixed-width patient: {fixed_patient}")
+            print(f"  EDI patient: {edi_patient}")
+            print(f"  Fixed-width line items: {fixed_items}")
+            print(f"  EDI line items: {edi_items}")
 
     # Show claims only in fixed-width
     if only_in_fixed:
@@ -204,7 +386,7 @@ def compare_files(fixed_width_path: str, edi_path: str):
         print(f"CLAIMS ONLY IN FIXED-WIDTH FILE (showing up to 10):")
         print("=" * 80)
 
-        for claim_num in sorted(only_in_fixed)[:10]:
+        for claim_num in heapq.nsmallest(10, only_in_fixed):
             claim = fixed_claims[claim_num]
             print(f"  {claim_num}: {claim.get('patient_name', 'N/A')}")
 
@@ -214,7 +396,7 @@ def compare_files(fixed_width_path: str, edi_path: str):
         print(f"CLAIMS ONLY IN EDI FILE (showing up to 10):")
         print("=" * 80)
 
-        for claim_num in sorted(only_in_edi)[:10]:
+        for claim_num in heapq.nsmallest(10, only_in_edi):
             claim = edi_claims[claim_num]
             print(f"  {claim_num}: {claim.get('patient_name', 'N/A')}")
 
@@ -231,6 +413,7 @@ def compare_files(fixed_width_path: str, edi_path: str):
         'fixed_claims': fixed_claims,
         'edi_claims': edi_claims,
         'matching': matching_claims,
+        'joined': joined,
         'only_fixed': only_in_fixed,
         'only_edi': only_in_edi
     }
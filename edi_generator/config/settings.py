@@ -5,13 +5,21 @@ including MongoDB connection, EDI identifiers, and feature flags.
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, fields
 from typing import Optional, List
 from pathlib import Path
 import json
 
+try:
+    import orjson  # Optional: faster config (de)serialization
+except ImportError:
+    orjson = None
 
-@dataclass
+# Environment values accepted as "on" for boolean feature flags
+TRUE_VALUES = frozenset({'true', '1', 'yes'})
+
+
+@dataclass(slots=True)
 class BillingProviderConfig:
     """Configuration for billing provider information."""
     name: str = "ScriptLogic WC LLC"
@@ -25,7 +33,7 @@ class BillingProviderConfig:
     taxonomy_code: str = "333600000X"
 
 
-@dataclass
+@dataclass(slots=True)
 class EDIConfig:
     """Configuration for EDI formatting and identifiers."""
     # ISA/IEA Level
@@ -61,7 +69,7 @@ class EDIConfig:
     use_line_level_hcp: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseConfig:
     """Configuration for MongoDB database connection."""
     uri: str = "mongodb://localhost:27017/"
@@ -78,7 +86,7 @@ class DatabaseConfig:
     timeout_ms: int = 30000
 
 
-@dataclass
+@dataclass(slots=True)
 class OutputConfig:
     """Configuration for output file generation."""
     output_dir: str = "837_output"
@@ -87,9 +95,10 @@ class OutputConfig:
     write_newlines: bool = False  # CRITICAL: Must be False for proper EDI format
     create_debug_file: bool = False
     validate_output: bool = True
+    generation_workers: int = 1  # >1 builds patient blocks in a process pool
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryConfig:
     """Configuration for claim query parameters."""
     # Default query mode
@@ -107,9 +116,18 @@ class QueryConfig:
             self.valid_statuses = ["B", "NB", "PB", "P", "F", "AR", "IP"]
 
 
+# Settable field names per configuration section class, computed once
+SECTION_FIELDS = {
+    cls: frozenset(f.name for f in fields(cls))
+    for cls in (BillingProviderConfig, EDIConfig, DatabaseConfig, OutputConfig, QueryConfig)
+}
+
+
 class Settings:
     """Main settings class that combines all configuration sections."""
 
+    __slots__ = ('billing_provider', 'edi', 'database', 'output', 'query')
+
     def __init__(self, config_file: Optional[str] = None, env_prefix: str = "EDI_"):
         """Initialize settings from file and environment variables.
 
@@ -135,16 +153,22 @@ class Settings:
 
     def _load_from_file(self, config_file: str):
         """Load settings from JSON configuration file."""
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+        if orjson is not None:
+            with open(config_file, 'rb') as f:
+                config = orjson.loads(f.read())
+        else:
+            with open(config_file, 'r') as f:
+                config = json.load(f)
 
         # Update each configuration section
         for section_name, section_config in config.items():
-            if hasattr(self, section_name):
-                section = getattr(self, section_name)
-                for key, value in section_config.items():
-                    if hasattr(section, key):
-                        setattr(section, key, value)
+            if section_name not in self.__slots__:
+                continue
+            section = getattr(self, section_name)
+            allowed = SECTION_FIELDS[type(section)]
+            for key, value in section_config.items():
+                if key in allowed:
+                    setattr(section, key, value)
 
     def _load_from_env(self, env_prefix: str):
         """Load settings from environment variables."""
@@ -170,25 +194,33 @@ class Settings:
 
         # Feature flags
         if use_claim_hcp := os.getenv(f"{env_prefix}USE_CLAIM_LEVEL_HCP"):
-            self.edi.use_claim_level_hcp = use_claim_hcp.lower() in ('true', '1', 'yes')
+            self.edi.use_claim_level_hcp = use_claim_hcp.lower() in TRUE_VALUES
 
         if use_line_hcp := os.getenv(f"{env_prefix}USE_LINE_LEVEL_HCP"):
-            self.edi.use_line_level_hcp = use_line_hcp.lower() in ('true', '1', 'yes')
+            self.edi.use_line_level_hcp = use_line_hcp.lower() in TRUE_VALUES
+
+        # Parallel generation
+        if workers := os.getenv(f"{env_prefix}GENERATION_WORKERS"):
+            self.output.generation_workers = int(workers)
 
     def to_dict(self) -> dict:
         """Convert settings to dictionary for serialization."""
         return {
-            'billing_provider': self.billing_provider.__dict__,
-            'edi': self.edi.__dict__,
-            'database': self.database.__dict__,
-            'output': self.output.__dict__,
-            'query': self.query.__dict__
+            'billing_provider': asdict(self.billing_provider),
+            'edi': asdict(self.edi),
+            'database': asdict(self.database),
+            'output': asdict(self.output),
+            'query': asdict(self.query)
         }
 
     def save_to_file(self, file_path: str):
         """Save current settings to JSON file."""
-        with open(file_path, 'w') as f:
-            json.dump(self.to_dict(), f, indent=2)
+        if orjson is not None:
+            with open(file_path, 'wb') as f:
+                f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
+        else:
+            with open(file_path, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
 
 
 # Global settings instance
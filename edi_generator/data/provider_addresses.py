@@ -4,6 +4,9 @@ This module contains address data for pharmacies and prescribers
 that match the reference EDI output format.
 """
 
+from types import MappingProxyType
+from typing import Mapping
+
 # Pharmacy addresses by NPI
 PHARMACY_ADDRESSES = {
     "1649391194": {
@@ -104,8 +107,26 @@ PRESCRIBER_ADDRESSES = {
     }
 }
 
+# Defaults returned for unknown NPIs. Shared read-only views, so lookups
+# don't allocate a fresh dict per call and callers can't mutate them.
+_EMPTY_PHARMACY = MappingProxyType({
+    "address": "",
+    "city": "",
+    "state": "",
+    "zip": "00000"
+})
+
+_EMPTY_PRESCRIBER = MappingProxyType({
+    "first_name": "",
+    "last_name": "",
+    "address": "",
+    "city": "",
+    "state": "",
+    "zip": "00000"
+})
+
 
-def get_pharmacy_address(npi: str) -> dict:
+def get_pharmacy_address(npi: str) -> Mapping[str, str]:
     """Get pharmacy address data by NPI.
 
     Args:
@@ -114,15 +135,10 @@ def get_pharmacy_address(npi: str) -> dict:
     Returns:
         Dictionary with address data or empty fields
     """
-    return PHARMACY_ADDRESSES.get(npi, {
-        "address": "",
-        "city": "",
-        "state": "",
-        "zip": "00000"
-    })
+    return PHARMACY_ADDRESSES.get(npi, _EMPTY_PHARMACY)
 
 
-def get_prescriber_data(npi: str) -> dict:
+def get_prescriber_data(npi: str) -> Mapping[str, str]:
     """Get prescriber name and address data by NPI.
 
     Args:
@@ -131,11 +147,4 @@ def get_prescriber_data(npi: str) -> dict:
     Returns:
         Dictionary with name and address data or empty fields
     """
-    return PRESCRIBER_ADDRESSES.get(npi, {
-        "first_name": "",
-        "last_name": "",
-        "address": "",
-        "city": "",
-        "state": "",
-        "zip": "00000"
-    })
\ No newline at end of file
+    return PRESCRIBER_ADDRESSES.get(npi, _EMPTY_PRESCRIBER)
\ No newline at end of file
@@ -5,7 +5,7 @@ and bulk operations to avoid N+1 query patterns.
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
@@ -15,6 +15,37 @@ from ..config.settings import DatabaseConfig
 
 logger = logging.getLogger(__name__)
 
+# Address fields read by Address.from_dict (plain and provider_ prefixed)
+ADDRESS_FIELDS = (
+    "address", "city", "state", "zip",
+    "provider_address", "provider_city", "provider_state", "provider_zip"
+)
+
+# Fields read from each claim_detail document during EDI generation
+CLAIM_FIELDS = (
+    "claim_id", "claim_number", "subscriber_num", "client_id",
+    "pharmacy_npi", "pharmacy", "doctor_no", "prescriber_name",
+    "trans_date", "rx_date", "rx_no", "drug_name", "drug", "ndc",
+    "quantity", "days_supply", "daw", "brand_gen",
+    "u_and_c", "plan_paid", "member_paid", "fee_schedule", "due_amount"
+)
+
+PATIENT_FIELDS = (
+    "claim_number", "first_name", "last_name", "date_of_injury", "gender"
+) + ADDRESS_FIELDS
+
+CLIENT_FIELDS = ("name",) + ADDRESS_FIELDS
+
+NPI_FIELDS = (
+    "npi", "provider_name", "first_name", "last_name",
+    "contact_number", "taxonomy_code"
+) + ADDRESS_FIELDS
+
+
+def _projection(fields: Tuple[str, ...], prefix: str = "") -> Dict[str, int]:
+    """Build an inclusion projection for the given fields."""
+    return {f"{prefix}{field}": 1 for field in fields}
+
 
 class DatabaseConnection:
     """Manages MongoDB connection and provides optimized query methods."""
@@ -117,6 +148,9 @@ class DatabaseConnection:
         if limit:
             pipeline.append({"$limit": limit})
 
+        # Drop unused claim fields before they flow through the lookups
+        pipeline.append({"$project": _projection(CLAIM_FIELDS)})
+
         # Lookup patient data - use claim_number field directly in claim_detail
         pipeline.append({
             "$lookup": {
@@ -124,7 +158,8 @@ class DatabaseConnection:
                 "let": {"claim_num": "$claim_number"},
                 "pipeline": [
                     {"$match": {"$expr": {"$eq": ["$claim_number", "$$claim_num"]}}},
-                    {"$limit": 1}  # Only take first patient record to avoid duplicates
+                    {"$limit": 1},  # Only take first patient record to avoid duplicates
+                    {"$project": _projection(PATIENT_FIELDS)}
                 ],
                 "as": "patient_data"
             }
@@ -144,7 +179,8 @@ class DatabaseConnection:
                 "from": self.config.client_collection,
                 "let": {"client_id": "$client_id"},
                 "pipeline": [
-                    {"$match": {"$expr": {"$eq": ["$client_id", "$$client_id"]}}}
+                    {"$match": {"$expr": {"$eq": ["$client_id", "$$client_id"]}}},
+                    {"$project": _projection(CLIENT_FIELDS)}
                 ],
                 "as": "client_data"
             }
@@ -158,49 +194,63 @@ class DatabaseConnection:
             }
         })
 
-        # Lookup pharmacy NPI data
+        # Lookup pharmacy and prescriber NPI data in a single pass. An
+        # array localField matches on any element, so both providers come
+        # back from one indexed equality lookup against the npi collection.
         pipeline.append({
-            "$lookup": {
-                "from": self.config.npi_collection,
-                "let": {"pharmacy_npi": "$pharmacy_npi"},
-                "pipeline": [
-                    {"$match": {"$expr": {"$eq": ["$npi", "$$pharmacy_npi"]}}}
-                ],
-                "as": "pharmacy_npi_data"
+            "$addFields": {
+                "npi_keys": ["$pharmacy_npi", "$doctor_no"]
             }
         })
 
-        # Unwind pharmacy NPI
         pipeline.append({
-            "$unwind": {
-                "path": "$pharmacy_npi_data",
-                "preserveNullAndEmptyArrays": True
+            "$lookup": {
+                "from": self.config.npi_collection,
+                "localField": "npi_keys",
+                "foreignField": "npi",
+                "as": "npi_data"
             }
         })
 
-        # Lookup prescriber NPI data
+        # Split the combined NPI results back into pharmacy and prescriber
         pipeline.append({
-            "$lookup": {
-                "from": self.config.npi_collection,
-                "let": {"doctor_no": "$doctor_no"},
-                "pipeline": [
-                    {"$match": {"$expr": {"$eq": ["$npi", "$$doctor_no"]}}}
-                ],
-                "as": "prescriber_npi_data"
+            "$addFields": {
+                "pharmacy_npi_data": {
+                    "$arrayElemAt": [
+                        {"$filter": {
+                            "input": "$npi_data",
+                            "cond": {"$eq": ["$$this.npi", "$pharmacy_npi"]}
+                        }},
+                        0
+                    ]
+                },
+                "prescriber_npi_data": {
+                    "$arrayElemAt": [
+                        {"$filter": {
+                            "input": "$npi_data",
+                            "cond": {"$eq": ["$$this.npi", "$doctor_no"]}
+                        }},
+                        0
+                    ]
+                }
             }
         })
 
-        # Unwind prescriber NPI
+        # Keep only the fields used for EDI generation; this also drops the
+        # temporary npi_keys/npi_data arrays
         pipeline.append({
-            "$unwind": {
-                "path": "$prescriber_npi_data",
-                "preserveNullAndEmptyArrays": True
+            "$project": {
+                **_projection(CLAIM_FIELDS),
+                "patient_data": 1,
+                "client_data": 1,
+                **_projection(NPI_FIELDS, "pharmacy_npi_data."),
+                **_projection(NPI_FIELDS, "prescriber_npi_data.")
             }
         })
 
         try:
             collection = self.db[self.config.claim_collection]
-            results = list(collection.aggregate(pipeline))
+            results = list(collection.aggregate(pipeline, batchSize=self.config.batch_size))
             logger.info(f"Retrieved {len(results)} claims with related data")
             return results
 
@@ -227,7 +277,11 @@ class DatabaseConnection:
         try:
             collection = self.db[self.config.claim_collection]
             # Use claim_id field as string
-            claims = list(collection.find({"claim_id": {"$in": claim_ids}}))
+            claims = list(collection.find(
+                {"claim_id": {"$in": claim_ids}},
+                projection=_projection(CLAIM_FIELDS),
+                batch_size=self.config.batch_size
+            ))
             logger.info(f"Retrieved {len(claims)} claims by IDs")
             return claims
 
@@ -258,26 +312,43 @@ class DatabaseConnection:
         }
 
         try:
+            batch_size = self.config.batch_size
+
             # Get patients by claim numbers (single query)
             if claim_numbers:
                 patient_coll = self.db[self.config.patient_collection]
-                patients = patient_coll.find({"claim_number": {"$in": claim_numbers}})
-                for patient in patients:
-                    result['patients'][patient.get('claim_number')] = patient
+                patients = patient_coll.find(
+                    {"claim_number": {"$in": claim_numbers}},
+                    projection=_projection(PATIENT_FIELDS),
+                    batch_size=batch_size
+                )
+                result['patients'] = {
+                    patient.get('claim_number'): patient for patient in patients
+                }
 
             # Get clients by IDs (single query)
             if client_ids:
                 client_coll = self.db[self.config.client_collection]
-                clients = client_coll.find({"client_id": {"$in": client_ids}})
-                for client in clients:
-                    result['clients'][str(client.get('client_id'))] = client
+                clients = client_coll.find(
+                    {"client_id": {"$in": client_ids}},
+                    projection=_projection(CLIENT_FIELDS + ("client_id",)),
+                    batch_size=batch_size
+                )
+                result['clients'] = {
+                    str(client.get('client_id')): client for client in clients
+                }
 
             # Get NPI providers (single query)
             if npi_numbers:
                 npi_coll = self.db[self.config.npi_collection]
-                providers = npi_coll.find({"npi": {"$in": npi_numbers}})
-                for provider in providers:
-                    result['providers'][str(provider.get('npi'))] = provider
+                providers = npi_coll.find(
+                    {"npi": {"$in": npi_numbers}},
+                    projection=_projection(NPI_FIELDS),
+                    batch_size=batch_size
+                )
+                result['providers'] = {
+                    str(provider.get('npi')): provider for provider in providers
+                }
 
             logger.info(
                 f"Retrieved related data - "
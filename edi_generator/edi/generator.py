@@ -5,8 +5,13 @@ maintaining exact compliance with X12 specifications.
 """
 
 import logging
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 
 from ..config.settings import Settings, EDIConfig, BillingProviderConfig
 from ..models.address import Address
@@ -17,13 +22,89 @@ from ..utils.formatters import (
     format_date_yymmdd,
     format_amount,
     format_quantity,
-    format_phone,
-    truncate_element
+    format_phone
 )
 from ..utils.counter_manager import EDICounterManager
 
 logger = logging.getLogger(__name__)
 
+# Newline-joined segments where each line passes validate_segment: ends in
+# "~" and is 3 to 999 characters long
+_SEGMENT_LINES_RE = re.compile(r"(?:[^\n]{2,998}~\n)*")
+# Segment ID, i.e. everything before the first element separator
+_SEGMENT_ID_RE = re.compile(r"^([^*\n]+)\*", re.MULTILINE)
+# Data of K3 segments other than K3*RX whose data is not exactly 80 characters
+_BAD_K3_RE = re.compile(r"^(?![^\n]*K3\*RX~)K3\*(?![^\n]{80}~$)([^\n]*)~$", re.MULTILINE)
+
+
+def _extract_oid(_id: Any) -> str:
+    """Normalize a MongoDB _id (extended JSON dict, ObjectId or plain value) to a string.
+
+    Args:
+        _id: Raw _id value from the claim record
+
+    Returns:
+        The id as a string, or empty string if missing
+    """
+    if _id is None:
+        return ""
+    if type(_id) is dict:  # Extended JSON {"$oid": ...}; rows share one shape
+        return str(_id.get("$oid", ""))
+    return str(_id)
+
+
+# Payer N3/N4 used when the client record has no address
+_DEFAULT_PAYER_ADDRESS_SEGMENTS = ("N3*PO BOX 436909~", "N4*Louisville*KY*40253~")
+
+# Fixed-shape segments emitted for every patient or prescription. These skip
+# the generic build_segment path; like it, they write None as an empty element.
+
+def _hl(number: int, parent: Any, level: str, child: str) -> str:
+    """Build an HL segment."""
+    return f"HL*{number}*{parent}*{level}*{child}~"
+
+
+def _ref(qualifier: str, value: Any) -> str:
+    """Build a REF segment."""
+    return f"REF*{qualifier}*{'' if value is None else value}~"
+
+
+def _dtp(qualifier: str, date_format: str, date: Any) -> str:
+    """Build a DTP segment."""
+    return f"DTP*{qualifier}*{date_format}*{'' if date is None else date}~"
+
+
+# Most patients sent to a pool worker in one task
+_PARALLEL_CHUNK_SIZE = 64
+
+# Generator copy used by process pool workers, set once per worker process
+_worker_generator = None
+
+
+def _init_worker(generator: "EDIGenerator"):
+    """Store the parent's generator in a pool worker."""
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _generate_patient_blocks(jobs: List[Tuple[str, Dict, int]]) -> List[Tuple[List[str], int]]:
+    """Generate a chunk of patients' segments in a pool worker.
+
+    Args:
+        jobs: (claim_number, patient_data, HL number the block starts after)
+            for each patient in the chunk
+
+    Returns:
+        (EDI segments, HL numbers used) for each patient, in job order
+    """
+    results = []
+    for claim_num, patient_data, hl_start in jobs:
+        _worker_generator.hl_counter = hl_start
+        block = []
+        _worker_generator._generate_patient_segments(patient_data, block, claim_num)
+        results.append((block, _worker_generator.hl_counter - hl_start))
+    return results
+
 
 class EDIGenerator:
     """Generates EDI 837 Professional claim files from MongoDB data."""
@@ -45,6 +126,20 @@ class EDIGenerator:
         self.lx_counter = 0
         self.st_index = 0
 
+        # Submitter, receiver and billing provider segments depend only on
+        # settings, so build them once and reuse them for every file
+        self._static_submitter_segments = self._build_submitter_segments()
+        self._static_billing_provider_segments = self._build_billing_provider_segments()
+
+        # GS and ST only vary in their dates and control numbers, so keep the
+        # settings-derived text around them and splice the values in per file
+        self._gs_prefix = (
+            f"GS*HC*{self.edi_config.functional_group_sender}"
+            f"*{self.edi_config.functional_group_receiver}*"
+        )
+        self._gs_suffix = f"*X*{self.edi_config.implementation_version}~"
+        self._st_suffix = f"*{self.edi_config.implementation_version}~"
+
     def generate_from_claims(self, claims: List[Dict[str, Any]]) -> List[str]:
         """Generate complete EDI file from claim data.
 
@@ -54,8 +149,57 @@ class EDIGenerator:
         Returns:
             List of EDI segments
         """
-        segments = []
+        segments = list(self.iter_segments(claims))
+        logger.info(f"Generated {len(segments)} EDI segments")
+        return segments
+
+    def write_file(self, claims: List[Dict[str, Any]], output_path: str) -> int:
+        """Generate the EDI file from claim data and stream it to disk.
+
+        Segments are written as they are generated rather than collected
+        into a list first. A partially written file is removed if
+        generation fails.
+
+        Args:
+            claims: List of claim records with embedded related data
+            output_path: Path of the EDI file to write
+
+        Returns:
+            Number of segments written
+        """
+        segment_count = 0
+
+        def counted(segments: Iterator[str]) -> Iterator[str]:
+            nonlocal segment_count
+            for segment in segments:
+                segment_count += 1
+                yield segment
 
+        try:
+            # Single line, no newlines
+            with open(output_path, 'w', buffering=1 << 20) as f:
+                f.writelines(counted(self.iter_segments(claims)))
+        except BaseException:
+            Path(output_path).unlink(missing_ok=True)
+            raise
+
+        logger.info(f"Generated {segment_count} EDI segments")
+        return segment_count
+
+    def iter_segments(self, claims: List[Dict[str, Any]]) -> Iterator[str]:
+        """Generate the EDI file from claim data one segment at a time.
+
+        Patient blocks are produced as they are consumed (one at a time, or a
+        bounded window of them when generating in a process pool), so callers
+        that write straight to disk (e.g. file.writelines) need not keep the
+        whole file as a list.
+
+        Args:
+            claims: List of claim records with embedded related data
+
+        Yields:
+            EDI segments in file order
+        """
         # Generate timestamps
         now = datetime.now()
         isa_date = now.strftime("%y%m%d")
@@ -69,141 +213,220 @@ class EDIGenerator:
         trans_num = self.counter_manager.get_transaction_number()
 
         # ISA - Interchange Control Header
-        segments.append(self.segment_builder.build_isa(
+        yield self.segment_builder.build_isa(
             sender_id=self.edi_config.interchange_sender_id,
             receiver_id=self.edi_config.interchange_receiver_id,
             date=isa_date,
             time=isa_time,
             control_number=interchange_num,  # Dynamic control number
             usage=self.edi_config.usage_indicator
-        ))
+        )
 
-        # GS - Functional Group Header
-        segments.append(self.segment_builder.build_segment(
-            "GS", "HC",
-            self.edi_config.functional_group_sender,
-            self.edi_config.functional_group_receiver,
-            bht_date,
-            isa_time,
-            group_num,  # Dynamic control number
-            "X",
-            self.edi_config.implementation_version
-        ))
+        # GS - Functional Group Header (group_num is the dynamic control number)
+        yield f"{self._gs_prefix}{bht_date}*{isa_time}*{group_num}{self._gs_suffix}"
 
-        # ST - Transaction Set Header
-        self.st_index = len(segments)
-        segments.append(self.segment_builder.build_segment(
-            "ST", "837",
-            trans_num,  # Dynamic control number (always "0001")
-            self.edi_config.implementation_version
-        ))
+        # ST - Transaction Set Header (trans_num is always "0001")
+        self.st_index = 2
+        yield f"ST*837*{trans_num}{self._st_suffix}"
 
         # BHT - Beginning of Hierarchical Transaction
-        segments.append(self.segment_builder.build_segment(
-            "BHT", "0019", "00",
-            f"SCRIPTLOGIC_{bht_date}",
-            bht_date,
-            bht_time,
-            "CH"
-        ))
-
-        # 1000A - Submitter
-        segments.append(self.segment_builder.build_segment(
-            "NM1", "41", "2",
-            self.edi_config.submitter_name,
-            "", "", "", "",
-            "46",
-            self.edi_config.submitter_id
-        ))
-
-        segments.append(self.segment_builder.build_segment(
-            "PER", "IC",
-            self.edi_config.submitter_contact_name,
-            "EM",
-            self.edi_config.submitter_contact_email
-        ))
+        yield f"BHT*0019*00*SCRIPTLOGIC_{bht_date}*{bht_date}*{bht_time}*CH~"
 
-        # 1000B - Receiver
-        segments.append(self.segment_builder.build_segment(
-            "NM1", "40", "2",
-            self.edi_config.receiver_name,
-            "", "", "", "",
-            "46",
-            self.edi_config.receiver_id
-        ))
-
-        # 2000A - Billing Provider Hierarchical Level
+        # 1000A/1000B submitter and receiver, 2000A/2010AA billing provider
+        yield from self._static_submitter_segments
         self.hl_counter = 1
-        segments.append(self.segment_builder.build_segment(
-            "HL", self.hl_counter, "", "20", "1"
-        ))
+        yield from self._static_billing_provider_segments
 
-        # 2010AA - Billing Provider
-        segments.append(self.segment_builder.build_segment(
-            "PRV", "BI", "PXC",
-            self.billing_provider.taxonomy_code
-        ))
-
-        segments.append(self.segment_builder.build_segment(
-            "NM1", "85", "2",
-            self.billing_provider.name,
-            "", "", "", "",
-            "XX",
-            self.billing_provider.npi
-        ))
-
-        billing_address = Address(
-            street=self.billing_provider.address,
-            city=self.billing_provider.city,
-            state=self.billing_provider.state,
-            zip_code=self.billing_provider.zip_code
-        )
-        segments.extend(billing_address.get_edi_segments())
-
-        segments.append(self.segment_builder.build_segment(
-            "REF", "EI",
-            self.billing_provider.tax_id
-        ))
-
-        segments.append(self.segment_builder.build_segment(
-            "PER", "IC",
-            self.billing_provider.name,
-            "TE",
-            self.billing_provider.phone
-        ))
+        # Running count of segments from ST onwards, for SE01
+        segment_count = (2 + len(self._static_submitter_segments)
+                         + len(self._static_billing_provider_segments))
 
         # Group claims by patient
         patients_dict = self._group_claims_by_patient(claims)
 
-        # Process each patient
-        for claim_num, patient_data in patients_dict.items():
-            segments.extend(self._generate_patient_segments(patient_data, claim_num))
+        # Process each patient, one block at a time
+        for block in self._iter_patient_blocks(patients_dict):
+            segment_count += len(block)
+            yield from block
 
-        # SE - Transaction Set Trailer
-        segment_count = len(segments) - self.st_index + 1
-        segments.append(self.segment_builder.build_segment(
-            "SE", segment_count,
+        # SE - Transaction Set Trailer (count includes SE itself)
+        yield self.segment_builder.build_segment(
+            "SE", segment_count + 1,
             trans_num  # Must match ST02
-        ))
+        )
 
         # GE - Functional Group Trailer
-        segments.append(self.segment_builder.build_segment(
+        yield self.segment_builder.build_segment(
             "GE", "1",
             group_num  # Must match GS06
-        ))
+        )
 
         # IEA - Interchange Control Trailer
-        segments.append(self.segment_builder.build_segment(
+        yield self.segment_builder.build_segment(
             "IEA", "1",
             interchange_num  # Must match ISA13
-        ))
+        )
 
-        logger.info(f"Generated {len(segments)} EDI segments")
-        return segments
+    def _iter_patient_blocks(self, patients_dict: Dict[str, Dict]) -> Iterator[List[str]]:
+        """Generate the segments for each patient, in patient order.
+
+        Args:
+            patients_dict: Grouped patient data from _group_claims_by_patient
+
+        Yields:
+            List of EDI segments for one patient
+        """
+        workers = self.settings.output.generation_workers
+        if workers > 1 and len(patients_dict) > 1:
+            yield from self._iter_patient_blocks_parallel(patients_dict, workers)
+            return
+
+        for claim_num, patient_data in patients_dict.items():
+            block = []
+            self._generate_patient_segments(patient_data, block, claim_num)
+            yield block
+
+    def _iter_patient_blocks_parallel(self, patients_dict: Dict[str, Dict], workers: int) -> Iterator[List[str]]:
+        """Generate patient blocks in a process pool, preserving patient order.
+
+        Each patient with prescriptions uses exactly two HL numbers and LX
+        restarts per patient, so every block's starting HL is known up front
+        and the blocks are independent. Patients are submitted in chunks with
+        at most workers * 4 chunks in flight, which bounds how many finished
+        blocks wait in memory for the consumer.
+
+        Args:
+            patients_dict: Grouped patient data from _group_claims_by_patient
+            workers: Number of worker processes
+
+        Yields:
+            List of EDI segments for one patient
+
+        Raises:
+            RuntimeError: If a worker used a different number of HL levels
+                than was assumed when numbering the blocks
+        """
+        max_in_flight = workers * 4
+        chunksize = max(1, min(_PARALLEL_CHUNK_SIZE, len(patients_dict) // max_in_flight))
+        pending = deque()
+
+        def collect() -> Iterator[List[str]]:
+            future, expected = pending.popleft()
+            for (block, hl_used), hl_expected in zip(future.result(), expected):
+                if hl_used != hl_expected:
+                    raise RuntimeError(
+                        f"Patient block used {hl_used} HL levels, expected {hl_expected}"
+                    )
+                yield block
+
+        hl = self.hl_counter
+        items = iter(patients_dict.items())
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            while True:
+                jobs = []
+                expected = []
+                for claim_num, patient_data in islice(items, chunksize):
+                    jobs.append((claim_num, patient_data, hl))
+                    hl_used = 2 if patient_data.get("prescriptions") else 0
+                    expected.append(hl_used)
+                    hl += hl_used
+                if not jobs:
+                    break
+
+                pending.append((executor.submit(_generate_patient_blocks, jobs), expected))
+                if len(pending) >= max_in_flight:
+                    yield from collect()
+
+            while pending:
+                yield from collect()
+
+        self.hl_counter = hl
+
+    def _build_submitter_segments(self) -> Tuple[str, ...]:
+        """Build the 1000A submitter and 1000B receiver segments.
+
+        Returns:
+            Tuple of EDI segments
+        """
+        return (
+            # 1000A - Submitter
+            self.segment_builder.build_segment(
+                "NM1", "41", "2",
+                self.edi_config.submitter_name,
+                "", "", "", "",
+                "46",
+                self.edi_config.submitter_id
+            ),
+            self.segment_builder.build_segment(
+                "PER", "IC",
+                self.edi_config.submitter_contact_name,
+                "EM",
+                self.edi_config.submitter_contact_email
+            ),
+            # 1000B - Receiver
+            self.segment_builder.build_segment(
+                "NM1", "40", "2",
+                self.edi_config.receiver_name,
+                "", "", "", "",
+                "46",
+                self.edi_config.receiver_id
+            ),
+        )
+
+    def _build_billing_provider_segments(self) -> Tuple[str, ...]:
+        """Build the 2000A/2010AA billing provider segments.
+
+        The billing provider is always HL 1, so its HL segment is static too.
+
+        Returns:
+            Tuple of EDI segments
+        """
+        billing_address = Address(
+            street=self.billing_provider.address,
+            city=self.billing_provider.city,
+            state=self.billing_provider.state,
+            zip_code=self.billing_provider.zip_code
+        )
+
+        return (
+            # 2000A - Billing Provider Hierarchical Level
+            self.segment_builder.build_segment(
+                "HL", 1, "", "20", "1"
+            ),
+            # 2010AA - Billing Provider
+            self.segment_builder.build_segment(
+                "PRV", "BI", "PXC",
+                self.billing_provider.taxonomy_code
+            ),
+            self.segment_builder.build_segment(
+                "NM1", "85", "2",
+                self.billing_provider.name,
+                "", "", "", "",
+                "XX",
+                self.billing_provider.npi
+            ),
+            *billing_address.get_edi_segments(),
+            self.segment_builder.build_segment(
+                "REF", "EI",
+                self.billing_provider.tax_id
+            ),
+            self.segment_builder.build_segment(
+                "PER", "IC",
+                self.billing_provider.name,
+                "TE",
+                self.billing_provider.phone
+            ),
+        )
 
     def _group_claims_by_patient(self, claims: List[Dict[str, Any]]) -> Dict[str, Dict]:
         """Group claims by patient for hierarchical structure.
 
+        Patients keep the order in which they first appear. A dict is used
+        rather than itertools.groupby because the claim queries do not sort
+        by claim number, and groupby would split a patient whose claims are
+        not adjacent into several HL blocks.
+
         Args:
             claims: List of claim records
 
@@ -211,94 +434,82 @@ class EDIGenerator:
             Dictionary keyed by claim_number with patient data
         """
         patients_dict = {}
+        patients_get = patients_dict.get
 
         for claim in claims:
-            # claim_detail has claim_number directly
-            claim_number = claim.get("claim_number", "")
-            if not claim_number:
-                # Fallback to subscriber_num for claim collection
-                claim_number = claim.get("subscriber_num", "")
+            # claim_detail has claim_number directly, with subscriber_num
+            # as the fallback for the claim collection
+            claim_number = claim.get("claim_number") or claim.get("subscriber_num")
             if not claim_number:
                 continue
 
-            if claim_number not in patients_dict:
+            entry = patients_get(claim_number)
+            if entry is None:
                 # Get patient data from embedded lookup
-                patient_info = claim.get("patient_data", {})
-                client_info = claim.get("client_data", {})
-
-                patients_dict[claim_number] = {
-                    "patient": patient_info,
-                    "client": client_info,
+                entry = patients_dict[claim_number] = {
+                    "patient": claim.get("patient_data", {}),
+                    "client": claim.get("client_data", {}),
                     "prescriptions": []
                 }
 
             # Add prescription data
-            patients_dict[claim_number]["prescriptions"].append(claim)
+            entry["prescriptions"].append(claim)
 
         return patients_dict
 
-    def _generate_patient_segments(self, patient_data: Dict, claim_number: str = "") -> List[str]:
+    def _generate_patient_segments(self, patient_data: Dict, segments: List[str], claim_number: str = "") -> None:
         """Generate all segments for a patient and their prescriptions.
 
         Args:
             patient_data: Patient data with prescriptions
-
-        Returns:
-            List of EDI segments
+            segments: Output list the segments are appended to
         """
-        segments = []
         patient = patient_data.get("patient", {})
         client = patient_data.get("client", {})
         prescriptions = patient_data.get("prescriptions", [])
 
         if not prescriptions:
-            return segments
+            return
+
+        edi_config = self.edi_config
+        payer_name = client.get("name", edi_config.payer_name)
 
         # 2000B - Subscriber Hierarchical Level
         self.hl_counter += 1
         subscriber_hl = self.hl_counter
-        segments.append(self.segment_builder.build_segment(
-            "HL", subscriber_hl, "1", "22", "1"
-        ))
+        segments.append(_hl(subscriber_hl, "1", "22", "1"))
 
         # 2010BA - Subscriber
-        segments.append(self.segment_builder.build_segment(
-            "SBR", "P", "", "", "", "", "", "", "", "WC"
-        ))
+        segments.append("SBR*P********WC~")
 
         segments.append(self.segment_builder.build_segment(
             "NM1", "IL", "2",
-            client.get("name", self.edi_config.payer_name)
+            payer_name
         ))
 
         # 2010BB - Payer
         segments.append(self.segment_builder.build_segment(
             "NM1", "PR", "2",
-            client.get("name", self.edi_config.payer_name),
+            payer_name,
             "", "", "", "",
             "PI",
-            self.edi_config.payer_id
+            edi_config.payer_id
         ))
 
         # Payer address
         payer_address = Address.from_dict(client)
         if not payer_address.is_empty():
-            segments.extend(payer_address.get_edi_segments())
+            payer_address.emit_edi_segments(segments)
         else:
             # Use default if no address
-            segments.extend([
-                "N3*PO BOX 436909~",
-                "N4*Louisville*KY*40253~"
-            ])
+            segments.extend(_DEFAULT_PAYER_ADDRESS_SEGMENTS)
 
         # 2000C - Patient Hierarchical Level
         self.hl_counter += 1
-        segments.append(self.segment_builder.build_segment(
-            "HL", self.hl_counter, subscriber_hl, "23", "0"
-        ))
+        segments.append(_hl(self.hl_counter, subscriber_hl, "23", "0"))
 
         # 2010CA - Patient
-        segments.append(self.segment_builder.build_segment("PAT", "20"))
+        segments.append("PAT*20~")
 
         segments.append(self.segment_builder.build_segment(
             "NM1", "QC", "1",
@@ -308,7 +519,7 @@ class EDIGenerator:
 
         # Patient address
         patient_address = Address.from_dict(patient)
-        segments.extend(patient_address.get_edi_segments())
+        patient_address.emit_edi_segments(segments)
 
         # Patient demographics - format date properly
         date_of_injury = format_date_yyyymmdd(patient.get("date_of_injury", ""))
@@ -319,44 +530,61 @@ class EDIGenerator:
             patient.get("gender", "")
         ))
 
-        segments.append(self.segment_builder.build_segment(
-            "REF", "Y4",
+        segments.append(_ref(
+            "Y4",
             patient.get("claim_number", claim_number)  # Use passed claim_number if patient doesn't have it
         ))
 
-        segments.append(self.segment_builder.build_segment(
-            "REF", "SY", "999999999"
-        ))
+        segments.append("REF*SY*999999999~")
 
         # Process each prescription as a claim
         self.lx_counter = 1
         for prescription in prescriptions:
-            segments.extend(self._generate_prescription_segments(prescription, patient, claim_number))
-
-        return segments
+            self._generate_prescription_segments(prescription, patient, date_of_injury, segments, claim_number)
 
-    def _generate_prescription_segments(self, prescription: Dict, patient: Dict, claim_number: str = "") -> List[str]:
+    def _generate_prescription_segments(self, prescription: Dict, patient: Dict, date_of_injury: str,
+                                        segments: List[str], claim_number: str = "") -> None:
         """Generate segments for a single prescription/claim.
 
         Args:
             prescription: Prescription/claim data
             patient: Patient data
-
-        Returns:
-            List of EDI segments
+            date_of_injury: Patient date of injury, already formatted as YYYYMMDD
+            segments: Output list the segments are appended to
         """
-        segments = []
+        # Hot lookups bound once per prescription
+        get = prescription.get
+        append = segments.append
+        edi_config = self.edi_config
+        use_claim_hcp = edi_config.use_claim_level_hcp
+        use_line_hcp = edi_config.use_line_level_hcp
+
+        # Amounts and dates shared by the claim and service line segments
+        fee_schedule = get("fee_schedule") or get("plan_paid", 0)
+        amount = format_amount(fee_schedule)
+        trans_date = format_date_yyyymmdd(get("trans_date", ""))
+
+        # HCP is identical at claim and line level, so build it at most once
+        hcp_segment = None
+        if use_claim_hcp or use_line_hcp:
+            due_amount = get("due_amount") or get("member_paid", 0)
+            hcp_segment = self.segment_builder.build_hcp(
+                format_amount(due_amount),            # due_amount
+                format_amount(get("u_and_c", 0)),     # uc_amount
+                edi_config.repricer_id,               # repricer_id
+                amount                                # fee_schedule
+            )
 
         # Get embedded NPI data
-        pharmacy_data = prescription.get("pharmacy_npi_data", {})
-        prescriber_data = prescription.get("prescriber_npi_data", {})
+        pharmacy_data = get("pharmacy_npi_data", {})
+        prescriber_data = get("prescriber_npi_data", {})
 
         # Create provider objects with fallback to embedded data
         if not pharmacy_data:
             # Use embedded pharmacy data from claim
             pharmacy = Provider(
-                npi=prescription.get("pharmacy_npi", ""),
-                organization_name=prescription.get("pharmacy", ""),
+                npi=get("pharmacy_npi", ""),
+                organization_name=get("pharmacy", ""),
                 provider_type="pharmacy"
             )
         else:
@@ -364,7 +592,7 @@ class EDIGenerator:
 
         if not prescriber_data:
             # Use embedded prescriber data from claim
-            prescriber_name = prescription.get("prescriber_name", "")
+            prescriber_name = get("prescriber_name", "")
             first_name = ""
             last_name = prescriber_name  # Default to full name as last name
 
@@ -376,7 +604,7 @@ class EDIGenerator:
                     first_name = parts[1].strip()
 
             prescriber = Provider(
-                npi=prescription.get("doctor_no", ""),
+                npi=get("doctor_no", ""),
                 first_name=first_name,
                 last_name=last_name,
                 provider_type="prescriber"
@@ -385,154 +613,115 @@ class EDIGenerator:
             prescriber = Provider.from_prescriber_data(prescriber_data)
 
         # 2300 - Claim Information
-        segments.append(self._generate_clm_segment(prescription, patient, claim_number))
+        append(self._generate_clm_segment(patient, amount, claim_number))
 
-        segments.append(self.segment_builder.build_segment(
-            "DTP", "439", "D8",
-            format_date_yyyymmdd(patient.get("date_of_injury", ""))
-        ))
+        append(_dtp("439", "D8", date_of_injury))
 
         # REF*D9 - Claim reference
-        trans_date = format_date_yyyymmdd(prescription.get('trans_date', ''))
-        unique_id = str(prescription.get('_id', {}).get('$oid', '') if isinstance(prescription.get('_id'), dict) else prescription.get('_id', ''))
-        ref_d9 = truncate_element(
-            f"{trans_date}"
-            f"{pharmacy.npi}"
-            f"{unique_id}",
-            50  # REF02 max length is 50 characters
-        )
-        segments.append(self.segment_builder.build_segment(
-            "REF", "D9", ref_d9
-        ))
+        unique_id = _extract_oid(get("_id"))
+        ref_d9 = f"{trans_date}{pharmacy.npi}{unique_id}"[:50]  # REF02 max length is 50 characters
+        append(_ref("D9", ref_d9))
 
         # K3*RX - Simple K3 segment
-        segments.append("K3*RX~")
+        append("K3*RX~")
 
         # HI - Diagnosis
-        segments.append(self.segment_builder.build_segment(
-            "HI", "ABK:R52"
-        ))
+        append("HI*ABK:R52~")
 
         # HCP - Claim level pricing (optional)
-        if self.edi_config.use_claim_level_hcp:
-            # Calculate fee_schedule if not present
-            fee_schedule = prescription.get("fee_schedule") or prescription.get("plan_paid", 0)
-            due_amount = prescription.get("due_amount") or prescription.get("member_paid", 0)
-
-            segments.append(self.segment_builder.build_hcp(
-                due_amount=format_amount(due_amount),
-                uc_amount=format_amount(prescription.get("u_and_c", 0)),
-                repricer_id=self.edi_config.repricer_id,
-                fee_schedule=format_amount(fee_schedule)
-            ))
+        if use_claim_hcp:
+            append(hcp_segment)
 
         # 2310C - Service Facility (Pharmacy)
-        segments.extend(pharmacy.get_edi_segments("77"))
+        pharmacy.emit_edi_segments("77", segments)
 
         # 2400 - Service Line
-        segments.extend(self._generate_service_line_segments(prescription, prescriber))
+        line_hcp = hcp_segment if use_line_hcp else None
+        self._generate_service_line_segments(prescription, prescriber, segments, amount, trans_date, line_hcp)
 
-        return segments
-
-    def _generate_clm_segment(self, prescription: Dict, patient: Dict, claim_number: str = "") -> str:
+    def _generate_clm_segment(self, patient: Dict, amount: str, claim_number: str = "") -> str:
         """Generate CLM segment for prescription.
 
         Args:
-            prescription: Prescription data
             patient: Patient data
+            amount: Formatted claim amount
 
         Returns:
             CLM segment string
         """
-        # Calculate amount from available fields
-        fee_schedule = prescription.get("fee_schedule") or prescription.get("plan_paid", 0)
-        amount = format_amount(fee_schedule)
         return self.segment_builder.build_clm(
-            claim_number=patient.get("claim_number", claim_number),  # Use passed claim_number if patient doesn't have it
-            amount=amount
+            patient.get("claim_number", claim_number),  # Use passed claim_number if patient doesn't have it
+            amount
         )
 
-    def _generate_service_line_segments(self, prescription: Dict, prescriber: Provider) -> List[str]:
+    def _generate_service_line_segments(self, prescription: Dict, prescriber: Provider, segments: List[str],
+                                        amount: str, trans_date: str, hcp_segment: Optional[str] = None) -> None:
         """Generate 2400 service line segments.
 
         Args:
             prescription: Prescription data
             prescriber: Prescriber provider object
-
-        Returns:
-            List of service line segments
+            segments: Output list the segments are appended to
+            amount: Formatted line amount
+            trans_date: Service date, already formatted as YYYYMMDD
+            hcp_segment: Line level HCP segment, or None to omit it
         """
-        segments = []
+        # Hot lookups bound once per service line
+        get = prescription.get
+        append = segments.append
+        build_segment = self.segment_builder.build_segment
 
         # LX - Service line counter
-        segments.append(self.segment_builder.build_segment(
-            "LX", self.lx_counter
-        ))
+        append(f"LX*{self.lx_counter}~")
 
         # SV1 - Professional service
-        fee_schedule = prescription.get("fee_schedule") or prescription.get("plan_paid", 0)
-        drug_name = prescription.get("drug_name") or prescription.get("drug", "")
-
-        segments.append(self.segment_builder.build_sv1(
-            procedure_code="HC:99070",
-            drug_name=drug_name,
-            amount=format_amount(fee_schedule),
-            quantity=format_quantity(prescription.get("quantity", 0))
+        drug_name = get("drug_name") or get("drug", "")
+
+        append(self.segment_builder.build_sv1(
+            "HC:99070",                           # procedure_code
+            drug_name,
+            amount,
+            format_quantity(get("quantity", 0))   # quantity
         ))
 
         # DTP - Service date
-        segments.append(self.segment_builder.build_segment(
-            "DTP", "472", "D8",
-            format_date_yyyymmdd(prescription.get("trans_date", ""))
-        ))
+        append(_dtp("472", "D8", trans_date))
 
         # REF*6R - Line item control number
-        segments.append(self.segment_builder.build_segment(
-            "REF", "6R",
-            prescription.get("rx_no", "")
-        ))
+        append(_ref("6R", get("rx_no", "")))
 
         # K3 - NCPDP segment (80 characters)
-        segments.append(self.segment_builder.build_k3_ncpdp(
+        append(self.segment_builder.build_k3_ncpdp(
             fill_number="00",
-            daw_code=prescription.get("daw", "0"),
+            daw_code=get("daw", "0"),
             basis_of_cost="01",
-            rx_date=format_date_yyyymmdd(prescription.get("rx_date", "")),
-            days_supply=prescription.get("days_supply", 0),
-            generic_flag=prescription.get("brand_gen", "")
+            rx_date=format_date_yyyymmdd(get("rx_date", "")),
+            days_supply=get("days_supply", 0),
+            generic_flag=get("brand_gen", "")
         ))
 
         # HCP - Line level pricing (optional)
-        if self.edi_config.use_line_level_hcp:
-            fee_schedule = prescription.get("fee_schedule") or prescription.get("plan_paid", 0)
-            due_amount = prescription.get("due_amount") or prescription.get("member_paid", 0)
-
-            segments.append(self.segment_builder.build_hcp(
-                due_amount=format_amount(due_amount),
-                uc_amount=format_amount(prescription.get("u_and_c", 0)),
-                repricer_id=self.edi_config.repricer_id,
-                fee_schedule=format_amount(fee_schedule)
-            ))
+        if hcp_segment is not None:
+            append(hcp_segment)
 
         # LIN - Drug identification
-        segments.append(self.segment_builder.build_segment(
+        append(build_segment(
             "LIN", "", "N4",
-            prescription.get("ndc", "")
+            get("ndc", "")
         ))
 
         # CTP - Drug quantity
-        days_supply = format_quantity(prescription.get("days_supply", 0))
-        segments.append(self.segment_builder.build_segment(
+        days_supply = format_quantity(get("days_supply", 0))
+        append(build_segment(
             "CTP", "", "", "",
             days_supply,
             "ME"
         ))
 
         # 2310B - Prescriber
-        segments.extend(prescriber.get_edi_segments("DK"))
+        prescriber.emit_edi_segments("DK", segments)
 
         self.lx_counter += 1
-        return segments
 
     def validate_output(self, segments: List[str]) -> List[str]:
         """Validate EDI output for compliance.
@@ -549,26 +738,53 @@ class EDIGenerator:
         if segments and len(segments[0]) != 106:
             errors.append(f"ISA segment length is {len(segments[0])}, expected 106")
 
-        # Validate each segment
-        for i, segment in enumerate(segments):
-            segment_errors = self.segment_builder.validate_segment(segment)
-            for error in segment_errors:
-                errors.append(f"Segment {i}: {error}")
+        # Fast path: one newline per segment and every line a well-formed
+        # segment means validate_segment would pass everywhere, so the segment
+        # IDs and bad K3 segments can be harvested with C-level regex scans
+        text = "\n".join(segments) + "\n" if segments else ""
+        if text.count("\n") == len(segments) and _SEGMENT_LINES_RE.fullmatch(text):
+            segment_ids = set(_SEGMENT_ID_RE.findall(text))
+            k3_lengths = [len(data) for data in _BAD_K3_RE.findall(text)]
+        else:
+            segment_ids, k3_lengths = self._validate_segments(segments, errors)
 
         # Check for required segments
         required_segments = ["ISA", "GS", "ST", "BHT", "SE", "GE", "IEA"]
-        segment_ids = [s[:3] for s in segments if len(s) >= 3]
         for req in required_segments:
             if req not in segment_ids:
                 errors.append(f"Missing required segment: {req}")
 
-        # Validate K3 segments
-        k3_segments = [s for s in segments if s.startswith("K3*")]
-        for k3 in k3_segments:
-            if "K3*RX~" not in k3:  # Simple K3
+        # K3 NCPDP segments must carry an 80 character data field
+        for length in k3_lengths:
+            errors.append(f"K3 NCPDP data length is {length}, expected 80")
+
+        return errors
+
+    def _validate_segments(self, segments: List[str], errors: List[str]) -> Tuple[set, List[int]]:
+        """Check each segment individually, for output that fails the fast path.
+
+        Args:
+            segments: List of EDI segments
+            errors: List that per-segment errors are appended to
+
+        Returns:
+            Tuple of (segment IDs seen, data lengths of bad K3 NCPDP segments)
+        """
+        validate_segment = self.segment_builder.validate_segment
+        segment_ids = set()
+        k3_lengths = []
+        for i, segment in enumerate(segments):
+            for error in validate_segment(segment):
+                errors.append(f"Segment {i}: {error}")
+
+            if match := _SEGMENT_ID_RE.match(segment):
+                segment_ids.add(match.group(1))
+
+            # Validate K3 segments
+            if segment.startswith("K3*") and "K3*RX~" not in segment:  # Simple K3
                 # Should be NCPDP format - check 80 character data field
-                data_part = k3[3:-1]  # Remove K3* and ~
+                data_part = segment[3:-1]  # Remove K3* and ~
                 if len(data_part) != 80:
-                    errors.append(f"K3 NCPDP data length is {len(data_part)}, expected 80")
+                    k3_lengths.append(len(data_part))
 
-        return errors
\ No newline at end of file
+        return segment_ids, k3_lengths
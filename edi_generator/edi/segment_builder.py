@@ -11,6 +11,17 @@ from ..utils.formatters import format_date_mmddyyyy
 
 logger = logging.getLogger(__name__)
 
+# Blank runs between the fixed-position K3 NCPDP fields (0-based, end exclusive)
+_K3_GAP_4_41 = " " * 37
+_K3_GAP_43_61 = " " * 18
+_K3_GAP_74_80 = " " * 6
+_K3_BLANK_DATE = " " * 8
+
+
+def _element(value: Any) -> Any:
+    """Map None to an empty element for the fixed-shape segment builders."""
+    return "" if value is None else value
+
 
 class EDISegmentBuilder:
     """Builds and validates EDI segments according to X12 specifications."""
@@ -20,6 +31,14 @@ class EDISegmentBuilder:
     SEGMENT_TERMINATOR = "~"
     SUBELEMENT_SEPARATOR = ":"
 
+    # Input formats accepted by format_date, in the order they are tried
+    _DATE_FORMATS = ("%Y%m%d", "%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y")
+
+    _ISA_FORMAT = (
+        "ISA*00*          *00*          *ZZ*{sender:<15.15}*ZZ*{receiver:<15.15}"
+        "*{date}*{time}*^*00501*{control:0>9.9}*1*{usage}*:~"
+    )
+
     @classmethod
     def build_k3_ncpdp(
         cls,
@@ -45,48 +64,36 @@ class EDISegmentBuilder:
         Returns:
             K3 segment with 80-character data field
         """
-        # Initialize 80-character array with spaces
-        k3_data = [' '] * 80
-
-        try:
-            # Position 1-2: Fill Number (required)
-            fill_str = str(fill_number).zfill(2)[:2]
-            k3_data[0:2] = list(fill_str)
-
-            # Position 4: DAW Code (required)
-            daw_str = str(daw_code)[0] if daw_code else "0"
-            k3_data[3] = daw_str
-
-            # Position 42-43: Basis of Cost (required)
-            basis_str = str(basis_of_cost).zfill(2)[:2]
-            k3_data[41:43] = list(basis_str)
-
-            # Position 62-69: Date Prescription Written (MMDDYYYY)
-            if rx_date:
-                formatted_date = format_date_mmddyyyy(rx_date)
-                if len(formatted_date) == 8:
-                    k3_data[61:69] = list(formatted_date)
-
-            # Position 71-73: Days Supply (3 digits)
-            days_str = str(days_supply).zfill(3)[:3]
-            k3_data[70:73] = list(days_str)
-
-            # Position 74: Generic Flag (optional)
-            if generic_flag in ['G', 'B']:
-                k3_data[73] = generic_flag
-
-        except Exception as e:
-            logger.error(f"Error building K3 segment: {e}")
-            # Return valid but empty K3 on error
-            k3_data = [' '] * 80
-
-        # Convert to string and ensure exactly 80 characters
-        k3_string = ''.join(k3_data)
-        if len(k3_string) != 80:
-            logger.warning(f"K3 data length is {len(k3_string)}, expected 80")
-            k3_string = k3_string[:80].ljust(80)
-
-        return f"K3*{k3_string}~"
+        # Position 1-2: Fill Number (required)
+        fill_str = "00" if fill_number is None else str(fill_number).zfill(2)[:2]
+
+        # Position 4: DAW Code (required)
+        daw_str = str(daw_code)[0] if daw_code else "0"
+
+        # Position 42-43: Basis of Cost (required)
+        basis_str = "01" if basis_of_cost is None else str(basis_of_cost).zfill(2)[:2]
+
+        # Position 62-69: Date Prescription Written (MMDDYYYY)
+        date_str = _K3_BLANK_DATE
+        if type(rx_date) is str and len(rx_date) == 8 and rx_date.isdigit():
+            # Callers pass CCYYMMDD, so reorder by slicing
+            date_str = rx_date[4:6] + rx_date[6:8] + rx_date[0:4]
+        elif rx_date:
+            formatted_date = format_date_mmddyyyy(rx_date)
+            if len(formatted_date) == 8:
+                date_str = formatted_date
+
+        # Position 71-73: Days Supply (3 digits)
+        days_str = "000" if days_supply is None else str(days_supply).zfill(3)[:3]
+
+        # Position 74: Generic Flag (optional)
+        generic_str = generic_flag if generic_flag in ('G', 'B') else " "
+
+        # Every piece has a fixed width, so the data is always 80 characters
+        return (
+            f"K3*{fill_str} {daw_str}{_K3_GAP_4_41}{basis_str}{_K3_GAP_43_61}"
+            f"{date_str} {days_str}{generic_str}{_K3_GAP_74_80}~"
+        )
 
     @classmethod
     def build_k3_simple(cls, content: str = "RX") -> str:
@@ -125,14 +132,15 @@ class EDISegmentBuilder:
         Returns:
             ISA segment string
         """
-        # Format fixed-width fields
-        sender_padded = sender_id[:15].ljust(15)
-        receiver_padded = receiver_id[:15].ljust(15)
-        control_padded = control_number[:9].zfill(9)
-
-        isa = (
-            f"ISA*00*          *00*          *ZZ*{sender_padded}*ZZ*"
-            f"{receiver_padded}*{date}*{time}*^*00501*{control_padded}*1*{usage}*:~"
+        # Sender/receiver are padded/truncated to 15 and the control
+        # number zero-filled to 9 by the template's format specs
+        isa = cls._ISA_FORMAT.format(
+            sender=sender_id,
+            receiver=receiver_id,
+            date=date,
+            time=time,
+            control=control_number,
+            usage=usage
         )
 
         # Validate length (should be 106)
@@ -152,19 +160,13 @@ class EDISegmentBuilder:
         Returns:
             Formatted segment string
         """
-        # Convert all elements to strings, handling None values
-        str_elements = []
-        for element in elements:
-            if element is None:
-                str_elements.append("")
-            else:
-                str_elements.append(str(element))
-
-        # Join with separator
-        segment = f"{segment_id}{cls.ELEMENT_SEPARATOR}{cls.ELEMENT_SEPARATOR.join(str_elements)}"
-
-        # Add terminator
-        segment += cls.SEGMENT_TERMINATOR
+        # Convert all elements to strings, handling None values, and join
+        # with separator and terminator
+        str_elements = ["" if element is None else str(element) for element in elements]
+        segment = (
+            f"{segment_id}{cls.ELEMENT_SEPARATOR}"
+            f"{cls.ELEMENT_SEPARATOR.join(str_elements)}{cls.SEGMENT_TERMINATOR}"
+        )
 
         # Validate length
         if len(segment) > cls.MAX_SEGMENT_LENGTH:
@@ -192,7 +194,10 @@ class EDISegmentBuilder:
         Returns:
             HCP segment string
         """
-        return cls.build_segment("HCP", "10", due_amount, uc_amount, repricer_id, fee_schedule)
+        return (
+            f"HCP*10*{_element(due_amount)}*{_element(uc_amount)}"
+            f"*{_element(repricer_id)}*{_element(fee_schedule)}~"
+        )
 
     @classmethod
     def build_clm(
@@ -214,19 +219,9 @@ class EDISegmentBuilder:
             CLM segment string
         """
         # Format: CLM*{claim_num}*{amount}***01:B:1*Y*A*Y*Y**EM~
-        return cls.build_segment(
-            "CLM",
-            claim_number,
-            amount,
-            "",  # Empty field
-            "",  # Empty field
-            f"01:B:{diagnosis_pointer}",
-            "Y",
-            "A",
-            "Y",
-            "Y",
-            "",  # Empty field
-            "EM"
+        return (
+            f"CLM*{_element(claim_number)}*{_element(amount)}"
+            f"***01:B:{diagnosis_pointer}*Y*A*Y*Y**EM~"
         )
 
     @classmethod
@@ -261,15 +256,10 @@ class EDISegmentBuilder:
         # Build composite procedure code
         proc_composite = f"{procedure_code}:::::{drug_name}"
 
-        return cls.build_segment(
-            "SV1",
-            proc_composite,
-            amount,
-            unit,
-            qty_formatted,
-            place_of_service,
-            "",  # Empty field
-            "1"  # Diagnosis pointer
+        # Trailing "1" is the diagnosis pointer, after an empty element
+        return (
+            f"SV1*{proc_composite}*{_element(amount)}*{_element(unit)}"
+            f"*{qty_formatted}*{_element(place_of_service)}**1~"
         )
 
     @classmethod
@@ -287,8 +277,20 @@ class EDISegmentBuilder:
             return ""
 
         try:
+            # Fast path for CCYYMMDD input, the common case: slice rather
+            # than round-trip through strptime/strftime
+            if len(date_str) == 8 and date_str.isascii() and date_str.isdigit():
+                if output_format == "D6":
+                    try:
+                        datetime(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:]))
+                    except ValueError:
+                        return date_str  # Not a real date; return as-is
+                    return date_str[2:]
+                # D8 output is the input itself, and unknown formats return it as-is
+                return date_str
+
             # Try to parse various formats
-            for fmt in ["%Y%m%d", "%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y"]:
+            for fmt in cls._DATE_FORMATS:
                 try:
                     dt = datetime.strptime(date_str, fmt)
                     break
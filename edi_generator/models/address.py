@@ -5,14 +5,39 @@ and generates properly formatted EDI segments.
 """
 
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, Optional, List, Tuple
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+# Trailing "STATE ZIP" or "STATE-ZIP" part of a comma-separated address
+_STATE_ZIP_RE = re.compile(r"^([A-Z]{2})\s*(\d{5}(?:-?\d{4})?)$")
+# Whole "street, city, STATE ZIP" string with exactly three non-blank parts
+_ADDRESS_RE = re.compile(
+    r"^\s*([^,]*[^,\s])\s*,\s*([^,]*[^,\s])\s*,\s*([A-Z]{2})\s*(\d{5}(?:-?\d{4})?)?\s*$"
+)
+_NON_DIGIT_RE = re.compile(r"\D")
 
-@dataclass
+# N3 written when the street is blank
+_DEFAULT_N3_SEGMENT = "N3*Address Not Available~"
+
+# String placeholders the source data uses for a missing value
+_NULL_SENTINELS = frozenset({"None", "null"})
+
+
+def _clean_text(value: Any) -> str:
+    """Convert a record value to a string, mapping empty values and null placeholders to ""."""
+    text = str(value) if value else ""
+    return "" if text in _NULL_SENTINELS else text
+
+
+def _digits_only(value: str) -> str:
+    """Strip non-digits, skipping the regex when the value is already all digits."""
+    return value if value.isdecimal() else _NON_DIGIT_RE.sub('', value)
+
+
+@dataclass(slots=True)
 class Address:
     """Represents a physical address with EDI formatting capabilities."""
 
@@ -34,10 +59,15 @@ class Address:
         if not address_str:
             return cls()
 
-        # Handle "None" string
-        if address_str == "None" or address_str == "null":
+        # Handle "None"/"null" strings
+        if address_str in _NULL_SENTINELS:
             return cls()
 
+        # Common case: parse all four parts in one regex pass
+        if match := _ADDRESS_RE.match(address_str):
+            street, city, state, zip_code = match.groups(default="")
+            return cls(street=street, city=city, state=state, zip_code=zip_code)
+
         try:
             # Split by comma
             parts = [p.strip() for p in address_str.split(",")]
@@ -53,7 +83,7 @@ class Address:
                 last_part = parts[2].strip()
                 # Try to extract state and zip
                 # Pattern: STATE ZIP or STATE-ZIP
-                match = re.match(r"^([A-Z]{2})\s*(\d{5}(?:-?\d{4})?)$", last_part)
+                match = _STATE_ZIP_RE.match(last_part)
                 if match:
                     state = match.group(1)
                     zip_code = match.group(2)
@@ -83,31 +113,26 @@ class Address:
         Returns:
             Address instance
         """
-        # Try with prefix first
-        street = str(data.get(f"{prefix}address", "") or "")
-        city = str(data.get(f"{prefix}city", "") or "")
-        state = str(data.get(f"{prefix}state", "") or "")
-        zip_code = data.get(f"{prefix}zip", "")
-
-        # For providers, also try provider_ prefix
-        if not street and not city:
-            street = str(data.get("provider_address", "") or "")
-            city = str(data.get("provider_city", "") or "")
-            state = str(data.get("provider_state", "") or "")
-            zip_code = data.get("provider_zip", "") or zip_code
-
-        # Clean up "None" strings
-        if street == "None":
-            street = ""
-        if city == "None":
-            city = ""
-        if state == "None":
-            state = ""
+        # Try with prefix first. A "None" placeholder counts as present
+        # here; it is only blanked below.
+        get = data.get
+        street = get(f"{prefix}address")
+        city = get(f"{prefix}city")
+
+        if street or city:
+            state = get(f"{prefix}state")
+            zip_code = get(f"{prefix}zip", "")
+        else:
+            # For providers, also try provider_ prefix
+            street = get("provider_address")
+            city = get("provider_city")
+            state = get("provider_state")
+            zip_code = get("provider_zip", "") or get(f"{prefix}zip", "")
 
         return cls(
-            street=street,
-            city=city,
-            state=state,
+            street=_clean_text(street),
+            city=_clean_text(city),
+            state=_clean_text(state),
             zip_code=cls._format_zip(zip_code)
         )
 
@@ -125,7 +150,7 @@ class Address:
             return "00000"
 
         # Convert to string and remove non-digits
-        zip_str = re.sub(r'\D', '', str(zip_value))
+        zip_str = _digits_only(str(zip_value))
 
         if not zip_str:
             return "00000"
@@ -147,8 +172,10 @@ class Address:
             N3 segment string (e.g., "N3*123 Main St~")
         """
         # Provide default if street is empty (required for data element 166)
-        street_value = self.street if self.street and self.street.strip() else "Address Not Available"
-        return f"N3*{street_value}~"
+        street = self.street
+        if not street or street.isspace():
+            return _DEFAULT_N3_SEGMENT
+        return f"N3*{street}~"
 
     def to_n4_segment(self) -> str:
         """Generate N4 (City/State/ZIP) segment for EDI.
@@ -170,16 +197,25 @@ class Address:
 
         return f"N4*{city_value}*{state_formatted}*{zip_value}~"
 
-    def get_edi_segments(self) -> List[str]:
+    def get_edi_segments(self) -> Tuple[str, str]:
         """Get both N3 and N4 segments for EDI output.
 
         Returns:
-            List containing N3 and N4 segments
+            Tuple containing N3 and N4 segments
         """
-        return [
+        return (
             self.to_n3_segment(),
             self.to_n4_segment()
-        ]
+        )
+
+    def emit_edi_segments(self, out: List[str]) -> None:
+        """Append the N3 and N4 segments to an output list.
+
+        Args:
+            out: Segment list to append to
+        """
+        out.append(self.to_n3_segment())
+        out.append(self.to_n4_segment())
 
     def is_empty(self) -> bool:
         """Check if address has any data.
@@ -206,7 +242,7 @@ class Address:
 
         # ZIP validation
         if self.zip_code and self.zip_code != "00000":
-            zip_clean = re.sub(r'\D', '', self.zip_code)
+            zip_clean = _digits_only(self.zip_code)
             if len(zip_clean) not in [5, 9]:
                 errors.append(f"ZIP must be 5 or 9 digits: {self.zip_code}")
 
@@ -5,16 +5,58 @@ for both prescribers and pharmacy facilities.
 """
 
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 import logging
+import re
 
-from .address import Address
+from .address import Address, _clean_text
 from ..data.provider_addresses import get_pharmacy_address, get_prescriber_data
 
 logger = logging.getLogger(__name__)
 
+_NON_DIGIT_RE = re.compile(r"\D")
+
+
+# The hardcoded provider tables never change at runtime, so each NPI's
+# Address is built once and shared. Providers treat it as read-only.
+
+@lru_cache(maxsize=4096)
+def _hardcoded_pharmacy_address(npi: str) -> Optional[Address]:
+    """Get the hardcoded Address for a pharmacy NPI, or None if there isn't one."""
+    hardcoded = get_pharmacy_address(npi)
+    if not hardcoded.get("address"):
+        return None
+    return Address(
+        street=hardcoded["address"],
+        city=hardcoded["city"],
+        state=hardcoded["state"],
+        zip_code=hardcoded["zip"]
+    )
+
+
+@lru_cache(maxsize=4096)
+def _hardcoded_prescriber(npi: str) -> Optional[Tuple[str, str, Address]]:
+    """Get hardcoded (first_name, last_name, Address) for a prescriber NPI, or None."""
+    hardcoded = get_prescriber_data(npi)
+    if not (hardcoded.get("first_name") or hardcoded.get("last_name")):
+        return None
+    return (
+        hardcoded["first_name"],
+        hardcoded["last_name"],
+        Address(
+            street=hardcoded["address"],
+            city=hardcoded["city"],
+            state=hardcoded["state"],
+            zip_code=hardcoded["zip"]
+        )
+    )
+
+# N3/N4 written when a provider has no address (required for validation)
+DEFAULT_ADDRESS_SEGMENTS = ("N3*Address Not Available~", "N4*Unknown*XX*00000~")
+
 
-@dataclass
+@dataclass(slots=True)
 class Provider:
     """Represents a healthcare provider (prescriber or pharmacy)."""
 
@@ -44,11 +86,7 @@ class Provider:
         # Parse name fields
         first_name = str(npi_data.get("first_name", "") or "")
         last_name = str(npi_data.get("last_name", "") or "")
-        org_name = str(npi_data.get("provider_name", "") or "")
-
-        # Handle "None" string values
-        if org_name == "None":
-            org_name = ""
+        org_name = _clean_text(npi_data.get("provider_name"))
 
         # Create address
         address = Address.from_dict(npi_data)
@@ -78,20 +116,11 @@ class Provider:
             return cls(npi="", provider_type="pharmacy")
 
         npi = str(pharmacy_data.get("npi", "") or "")
-        org_name = str(pharmacy_data.get("provider_name", "") or "")
-        if org_name == "None" or org_name == "null":
-            org_name = ""
+        org_name = _clean_text(pharmacy_data.get("provider_name"))
 
         # Try to get hardcoded address first
-        hardcoded = get_pharmacy_address(npi)
-        if hardcoded.get("address"):
-            address = Address(
-                street=hardcoded["address"],
-                city=hardcoded["city"],
-                state=hardcoded["state"],
-                zip_code=hardcoded["zip"]
-            )
-        else:
+        address = _hardcoded_pharmacy_address(npi)
+        if address is None:
             address = Address.from_dict(pharmacy_data)
 
         return cls(
@@ -118,24 +147,17 @@ class Provider:
         npi = str(prescriber_data.get("npi", "") or "")
 
         # Try to get hardcoded data first
-        hardcoded = get_prescriber_data(npi)
-        if hardcoded.get("first_name") or hardcoded.get("last_name"):
-            first_name = hardcoded["first_name"]
-            last_name = hardcoded["last_name"]
-            address = Address(
-                street=hardcoded["address"],
-                city=hardcoded["city"],
-                state=hardcoded["state"],
-                zip_code=hardcoded["zip"]
-            )
+        hardcoded = _hardcoded_prescriber(npi)
+        if hardcoded is not None:
+            first_name, last_name, address = hardcoded
         else:
             # Handle name parsing from MongoDB data
-            first_name = str(prescriber_data.get("first_name", "") or "")
-            last_name = str(prescriber_data.get("last_name", "") or "")
+            first_name = _clean_text(prescriber_data.get("first_name"))
+            last_name = _clean_text(prescriber_data.get("last_name"))
 
             # If first/last names are None/empty, parse from provider_name
-            if (not first_name or first_name == "None") and (not last_name or last_name == "None"):
-                provider_name = str(prescriber_data.get("provider_name", "") or "")
+            if not first_name and not last_name:
+                provider_name = _clean_text(prescriber_data.get("provider_name"))
                 if ", " in provider_name:
                     # Format: "LAST, FIRST"
                     parts = provider_name.split(", ", 1)
@@ -152,11 +174,9 @@ class Provider:
                     # Single name - put in last name
                     last_name = provider_name
 
-            # Clean up "None" strings
-            if first_name == "None":
-                first_name = ""
-            if last_name == "None":
-                last_name = ""
+                # Either half of the parsed name may itself be a placeholder
+                first_name = _clean_text(first_name)
+                last_name = _clean_text(last_name)
 
             address = Address.from_dict(prescriber_data)
 
@@ -183,8 +203,9 @@ class Provider:
             return ""
 
         # Convert to string and keep only digits
-        import re
-        phone_digits = re.sub(r'\D', '', str(phone))
+        phone_digits = str(phone)
+        if not phone_digits.isdecimal():
+            phone_digits = _NON_DIGIT_RE.sub('', phone_digits)
 
         # Must be exactly 10 digits for US phone
         if len(phone_digits) == 10:
@@ -212,27 +233,33 @@ class Provider:
             # NM1*DK*1*{last}*{first}****XX*{npi}~
             return f"NM1*{qualifier}*1*{self.last_name}*{self.first_name}****XX*{self.npi}~"
 
-    def get_edi_segments(self, qualifier: str) -> List[str]:
+    def get_edi_segments(self, qualifier: str) -> Tuple[str, ...]:
         """Get all EDI segments for this provider.
 
         Args:
             qualifier: EDI qualifier code
 
         Returns:
-            List of EDI segments (NM1, N3, N4)
+            Tuple of EDI segments (NM1, N3, N4)
+        """
+        nm1 = self.to_nm1_segment(qualifier)
+        if self.address:
+            return (nm1,) + self.address.get_edi_segments()
+        return (nm1,) + DEFAULT_ADDRESS_SEGMENTS
+
+    def emit_edi_segments(self, qualifier: str, out: List[str]) -> None:
+        """Append the NM1, N3 and N4 segments for this provider to an output list.
+
+        Args:
+            qualifier: EDI qualifier code
+            out: Segment list to append to
         """
-        segments = [self.to_nm1_segment(qualifier)]
+        out.append(self.to_nm1_segment(qualifier))
 
         if self.address:
-            segments.extend(self.address.get_edi_segments())
+            self.address.emit_edi_segments(out)
         else:
-            # Add default address when no address available (required for validation)
-            segments.extend([
-                "N3*Address Not Available~",
-                "N4*Unknown*XX*00000~"
-            ])
-
-        return segments
+            out.extend(DEFAULT_ADDRESS_SEGMENTS)
 
     def validate(self) -> List[str]:
         """Validate provider data.
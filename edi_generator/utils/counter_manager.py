@@ -6,8 +6,10 @@ ensuring unique control numbers across EDI file generations.
 
 import json
 import os
+import shutil
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 from datetime import datetime
 import logging
 import fcntl
@@ -31,20 +33,36 @@ class EDICounterManager:
 
         self.counter_dir.mkdir(parents=True, exist_ok=True)
         self.counter_file = self.counter_dir / "edi_counters.json"
+        self.backup_file = self.counter_dir / "edi_counters.json.bak"
         self.backup_dir = self.counter_dir / "backups"
-        self.backup_dir.mkdir(exist_ok=True)
+        self._lock_path = self.counter_dir / "edi_counters.lock"
 
         self._ensure_counters_exist()
 
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold an exclusive lock on the counter file across processes.
+
+        Wrap every load-modify-save of the counters in this so concurrent
+        runs can't allocate the same interchange number. Not reentrant.
+        """
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
     def _ensure_counters_exist(self):
         """Initialize counters if file doesn't exist."""
-        if not self.counter_file.exists():
-            initial_counters = {
-                "interchange_control_number": 5,
-                "last_updated": datetime.now().isoformat()
-            }
-            self._save_counters(initial_counters)
-            logger.info(f"Initialized counters at {self.counter_file}")
+        with self._locked():
+            if not self.counter_file.exists():
+                initial_counters = {
+                    "interchange_control_number": 5,
+                    "last_updated": datetime.now().isoformat()
+                }
+                self._save_counters(initial_counters)
+                logger.info(f"Initialized counters at {self.counter_file}")
 
     def _load_counters(self) -> Dict:
         """Load current counter values."""
@@ -55,32 +73,46 @@ class EDICounterManager:
             logger.error(f"Error loading counters: {e}")
             raise
 
-    def _save_counters(self, counters: Dict):
-        """Save counter values with backup."""
-        # Create backup before saving
+    def _save_counters(self, counters: Dict, timestamp: Optional[str] = None):
+        """Save counter values with backup.
+
+        Args:
+            counters: Counter values to save
+            timestamp: ISO timestamp for last_updated (default: now)
+        """
+        # Keep the previous values in a single backup file, overwritten on each save
         if self.counter_file.exists():
-            backup_file = self.backup_dir / f"counters_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            backup_file.write_text(self.counter_file.read_text())
+            shutil.copyfile(self.counter_file, self.backup_file)
 
         # Update timestamp
-        counters["last_updated"] = datetime.now().isoformat()
+        counters["last_updated"] = timestamp or datetime.now().isoformat()
 
-        # Save atomically
+        # Save atomically. The temp file is flushed to disk before the rename and
+        # the directory after it, so a crash can't leave an empty counter file.
         temp_file = self.counter_file.with_suffix('.tmp')
         with open(temp_file, 'w') as f:
             json.dump(counters, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
         temp_file.replace(self.counter_file)
 
+        dir_fd = os.open(self.counter_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
     def get_next_interchange_number(self) -> str:
         """Get next interchange control number (ISA13).
 
         Returns:
             Zero-padded 9-digit string
         """
-        counters = self._load_counters()
-        current = counters["interchange_control_number"]
-        counters["interchange_control_number"] = current + 1
-        self._save_counters(counters)
+        with self._locked():
+            counters = self._load_counters()
+            current = counters["interchange_control_number"]
+            counters["interchange_control_number"] = current + 1
+            self._save_counters(counters)
 
         formatted = str(current).zfill(9)
         logger.info(f"Allocated interchange control number: {formatted}")
@@ -125,17 +157,21 @@ class EDICounterManager:
         if not confirm:
             raise ValueError("Must confirm counter reset")
 
-        # Create backup before reset
-        if self.counter_file.exists():
-            backup_file = self.backup_dir / f"reset_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            backup_file.write_text(self.counter_file.read_text())
-
-        initial_counters = {
-            "interchange_control_number": 1,
-            "last_updated": datetime.now().isoformat(),
-            "reset_at": datetime.now().isoformat()
-        }
-        self._save_counters(initial_counters)
+        now = datetime.now()
+        with self._locked():
+            # Create backup before reset
+            if self.counter_file.exists():
+                self.backup_dir.mkdir(exist_ok=True)
+                backup_file = self.backup_dir / f"reset_backup_{now.strftime('%Y%m%d_%H%M%S')}.json"
+                backup_file.write_text(self.counter_file.read_text())
+
+            reset_at = now.isoformat()
+            initial_counters = {
+                "interchange_control_number": 1,
+                "last_updated": reset_at,
+                "reset_at": reset_at
+            }
+            self._save_counters(initial_counters, timestamp=reset_at)
         logger.warning("Interchange counter has been reset to 1")
 
     def set_interchange_counter(self, value: int):
@@ -144,7 +180,12 @@ class EDICounterManager:
         Args:
             value: New interchange control number value
         """
-        counters = self._load_counters()
-        counters["interchange_control_number"] = value
-        logger.info(f"Set interchange control number to {value}")
-        self._save_counters(counters)
\ No newline at end of file
+        with self._locked():
+            counters = self._load_counters()
+            if counters.get("interchange_control_number") == value:
+                logger.info(f"Interchange control number is already {value}")
+                return
+
+            counters["interchange_control_number"] = value
+            logger.info(f"Set interchange control number to {value}")
+            self._save_counters(counters)
\ No newline at end of file
@@ -1,12 +1,53 @@
 """Utility functions for EDI field formatting."""
 
 from datetime import datetime
+from functools import lru_cache, wraps
 from typing import Union, Optional
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# A string amount already in canonical 2-decimal form ("12.50", "-3.00")
+_MONEY_RE = re.compile(r"-?(?:0|[1-9][0-9]*)\.[0-9]{2}")
+# Likewise for a quantity in 3-decimal form ("30.000")
+_QUANTITY_RE = re.compile(r"-?(?:0|[1-9][0-9]*)\.[0-9]{3}")
 
+
+def memoize_str(maxsize: int):
+    """Cache a single-argument formatter on its string input.
+
+    Claim data repeats the same dates and values many times per file, so
+    the formatted result is cached. Only exact ``str`` inputs are cached:
+    other types can compare equal while formatting differently (``0.0`` and
+    ``-0.0``, the same instant in two timezones), so they always call
+    through to the formatter.
+
+    Args:
+        maxsize: Maximum number of cached values
+    """
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+
+        @wraps(func)
+        def wrapper(value):
+            if type(value) is str:
+                return cached(value)
+            return func(value)
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+
+    return decorator
+
+
+def _digits(value: str) -> str:
+    """Keep only the digit characters, skipping the filter when there is nothing to drop."""
+    return value if value.isdigit() else ''.join(filter(str.isdigit, value))
+
+
+@memoize_str(maxsize=8192)
 def format_date_yyyymmdd(date_value: Union[str, datetime, None]) -> str:
     """Format date to YYYYMMDD format for EDI.
 
@@ -24,6 +65,19 @@ def format_date_yyyymmdd(date_value: Union[str, datetime, None]) -> str:
     if not date_value:
         return ""
 
+    # Fast paths for the common shapes, without the split/join below
+    value_type = type(date_value)
+    if value_type is str:
+        if len(date_value) == 8 and date_value.isdigit():
+            return date_value
+        # "YYYY-MM-DD", optionally followed by " HH:MM:SS"
+        ymd = date_value[0:4] + date_value[5:7] + date_value[8:10]
+        if (date_value[4:5] == '-' and date_value[7:8] == '-'
+                and date_value[10:11] in ('', ' ') and ymd.isdigit()):
+            return ymd
+    elif value_type is datetime:
+        return date_value.strftime('%Y%m%d')
+
     try:
         # Handle datetime objects
         if hasattr(date_value, 'strftime'):
@@ -54,6 +108,7 @@ def format_date_yyyymmdd(date_value: Union[str, datetime, None]) -> str:
         return ""
 
 
+@memoize_str(maxsize=8192)
 def format_date_yymmdd(date_value: Union[str, datetime, None]) -> str:
     """Format date to YYMMDD format for ISA segment.
 
@@ -63,6 +118,11 @@ def format_date_yymmdd(date_value: Union[str, datetime, None]) -> str:
     Returns:
         Date string in YYMMDD format
     """
+    # Years before 1000 take the path below, which rejects them as %Y
+    # is not zero-padded there
+    if type(date_value) is datetime and date_value.year >= 1000:
+        return date_value.strftime('%y%m%d')
+
     yyyymmdd = format_date_yyyymmdd(date_value)
     if len(yyyymmdd) == 8:
         return yyyymmdd[2:]  # Remove century
@@ -78,6 +138,11 @@ def format_date_mmddyyyy(date_value: Union[str, datetime, None]) -> str:
     Returns:
         Date string in MMDDYYYY format
     """
+    # Years before 1000 take the path below, which rejects them as %Y
+    # is not zero-padded there
+    if type(date_value) is datetime and date_value.year >= 1000:
+        return date_value.strftime('%m%d%Y')
+
     yyyymmdd = format_date_yyyymmdd(date_value)
     if len(yyyymmdd) == 8:
         return yyyymmdd[4:6] + yyyymmdd[6:8] + yyyymmdd[0:4]
@@ -96,6 +161,10 @@ def format_amount(amount: Union[float, int, str, None]) -> str:
     if amount is None:
         return "0.00"
 
+    # Already formatted: return as-is rather than round-tripping through float
+    if type(amount) is str and _MONEY_RE.fullmatch(amount):
+        return amount
+
     try:
         # Convert to float
         amount_float = float(amount)
@@ -117,6 +186,10 @@ def format_quantity(quantity: Union[float, int, str, None]) -> str:
     if quantity is None:
         return "0.000"
 
+    # Already formatted: return as-is rather than round-tripping through float
+    if type(quantity) is str and _QUANTITY_RE.fullmatch(quantity):
+        return quantity
+
     try:
         qty_float = float(quantity)
         return f"{qty_float:.3f}"
@@ -125,6 +198,7 @@ def format_quantity(quantity: Union[float, int, str, None]) -> str:
         return "0.000"
 
 
+@memoize_str(maxsize=4096)
 def format_phone(phone: Union[str, None]) -> str:
     """Format phone number to 10 digits only.
 
@@ -138,7 +212,7 @@ def format_phone(phone: Union[str, None]) -> str:
         return ""
 
     # Remove all non-digit characters
-    phone_digits = ''.join(filter(str.isdigit, str(phone)))
+    phone_digits = _digits(str(phone))
 
     # Ensure 10 digits
     if len(phone_digits) == 10:
@@ -150,6 +224,7 @@ def format_phone(phone: Union[str, None]) -> str:
         return phone_digits[:10].ljust(10, '0')
 
 
+@memoize_str(maxsize=4096)
 def format_zip(zip_code: Union[str, int, None]) -> str:
     """Format ZIP code to 5 or 9 digits.
 
@@ -163,7 +238,7 @@ def format_zip(zip_code: Union[str, int, None]) -> str:
         return ""
 
     # Convert to string and remove non-digits
-    zip_str = ''.join(filter(str.isdigit, str(zip_code)))
+    zip_str = _digits(str(zip_code))
 
     # Return 5 or 9 digits
     if len(zip_str) >= 9:
@@ -177,6 +252,9 @@ def format_zip(zip_code: Union[str, int, None]) -> str:
 def truncate_element(value: str, max_length: int) -> str:
     """Truncate element to maximum allowed length.
 
+    Logs a warning when truncating. Hot paths that build a value already
+    known to be a string can slice it directly instead.
+
     Args:
         value: Element value
         max_length: Maximum allowed length
@@ -187,6 +265,10 @@ def truncate_element(value: str, max_length: int) -> str:
     if not value:
         return ""
 
+    # Common case: a string that already fits
+    if type(value) is str and len(value) <= max_length:
+        return value
+
     value_str = str(value)
     if len(value_str) > max_length:
         logger.warning(f"Truncating element from {len(value_str)} to {max_length} chars")
@@ -7,20 +7,25 @@ by pulling data from MongoDB and formatting according to HIPAA standards.
 
 import argparse
 import logging
+import signal
 import sys
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from edi_generator.config.settings import Settings
-from edi_generator.database.connection import DatabaseConnection
-from edi_generator.edi.generator import EDIGenerator
+# Only the counter manager is needed by the counter-management options.
+# The database driver, generator and settings are imported once main()
+# knows it is generating, so --help and the counter options start fast.
 from edi_generator.utils.counter_manager import EDICounterManager
-from test_claim_ids import TEST_CLAIM_IDS
+
+if TYPE_CHECKING:
+    from edi_generator.config.settings import Settings
+    from edi_generator.database.connection import DatabaseConnection
+    from edi_generator.edi.generator import EDIGenerator
 
 # Configure logging
 logging.basicConfig(
@@ -72,6 +77,7 @@ Examples:
   %(prog)s --query-mode date-range --date-range "2024-01-01:2024-01-31"
   %(prog)s --query-mode status --statuses "B,NB"
   %(prog)s --test-mode  # Uses built-in test claim IDs
+  %(prog)s --serve < batches.txt  # One file per line of claim IDs
         """
     )
 
@@ -180,6 +186,14 @@ Examples:
         help="Only validate EDI output, don't write file"
     )
 
+    # Long-running mode
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the database connection open and generate one file per line of "
+             "comma-separated claim IDs read from stdin"
+    )
+
     # Counter management options
     parser.add_argument(
         "--show-counters",
@@ -208,9 +222,184 @@ def get_test_claim_ids() -> List[str]:
     Returns:
         List of 149 test claim IDs matching reference file
     """
+    from test_claim_ids import TEST_CLAIM_IDS
     return TEST_CLAIM_IDS
 
 
+def run_once(
+    args: argparse.Namespace,
+    settings: "Settings",
+    db: "DatabaseConnection",
+    generator: Optional["EDIGenerator"] = None,
+    output_suffix: Optional[str] = None,
+    claim_ids: Optional[List[str]] = None,
+    client_id: Optional[str] = None,
+    date_range: Optional[Tuple[str, str]] = None,
+    statuses: Optional[List[str]] = None,
+    limit: Optional[int] = None
+) -> int:
+    """Query one batch of claims and generate its EDI file.
+
+    Args:
+        args: Parsed command-line arguments
+        settings: Application settings
+        db: Connected database
+        generator: EDI generator to reuse (default: create one)
+        output_suffix: Suffix for the auto-generated file name; when set,
+            --output is ignored so each batch gets its own file
+        claim_ids: Claim IDs to query
+        client_id: Client ID to filter by
+        date_range: (start, end) dates in YYYYMMDD format
+        statuses: Claim statuses to filter by
+        limit: Maximum number of claims to process
+
+    Returns:
+        Exit code (0 for success, non-zero for error)
+    """
+    # Query claims with optimized aggregation
+    logger.info("=" * 60)
+    logger.info("Querying claims from database...")
+    logger.info("=" * 60)
+
+    claims = db.get_claims_optimized(
+        claim_ids=claim_ids,
+        client_id=client_id,
+        date_range=date_range,
+        statuses=statuses,
+        limit=limit
+    )
+
+    if not claims:
+        logger.warning("No claims found matching criteria")
+        return 0
+
+    logger.info(f"Found {len(claims)} claims to process")
+
+    # Generate EDI
+    if not args.dry_run:
+        logger.info("=" * 60)
+        logger.info("Generating EDI output...")
+        logger.info("=" * 60)
+
+        if generator is None:
+            from edi_generator.edi.generator import EDIGenerator
+            generator = EDIGenerator(settings)
+
+        if args.validate_only:
+            # Just validate, don't write
+            segments = generator.generate_from_claims(claims)
+            errors = generator.validate_output(segments)
+            if errors:
+                logger.error(f"Validation failed with {len(errors)} errors:")
+                for error in errors[:10]:  # Show first 10 errors
+                    logger.error(f"  - {error}")
+                return 1
+            else:
+                logger.info("✅ EDI validation passed")
+                logger.info(f"   Segments: {len(segments)}")
+                return 0
+
+        # Write output file
+        output_path = args.output if output_suffix is None else None
+        if not output_path:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = f"{settings.output.output_dir}/837_db_{timestamp}{output_suffix or ''}.txt"
+
+        # Ensure output directory exists
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Write EDI file, streaming segments as they are generated
+        segment_count = generator.write_file(claims, output_path)
+
+        # Report statistics
+        file_size = Path(output_path).stat().st_size
+        logger.info("=" * 60)
+        logger.info(f"✅ EDI file generated: {output_path}")
+        logger.info(f"   File size: {file_size:,} bytes")
+        logger.info(f"   Segments: {segment_count}")
+        logger.info(f"   Claims processed: {len(claims)}")
+        logger.info("=" * 60)
+
+    else:
+        logger.info("Dry run mode - no output generated")
+        logger.info(f"Would process {len(claims)} claims")
+
+    return 0
+
+
+class _StopServing(Exception):
+    """Raised by serve's SIGTERM handler to interrupt waiting for input."""
+
+
+def serve(args: argparse.Namespace, settings: "Settings", db: "DatabaseConnection") -> int:
+    """Generate one EDI file per line of comma-separated claim IDs on stdin.
+
+    The database connection and EDI generator are reused across batches.
+    Runs until stdin is closed, or until the batch in progress when SIGTERM
+    is received has finished.
+
+    Args:
+        args: Parsed command-line arguments
+        settings: Application settings
+        db: Connected database
+
+    Returns:
+        Exit code (0 if every batch succeeded, 1 otherwise)
+    """
+    # On SIGTERM, finish the current batch and stop before the next one.
+    # While idle the handler raises instead, since the blocked stdin read
+    # would otherwise resume and wait for another line.
+    stop_requested = False
+    in_batch = False
+
+    def request_stop(signum, frame):
+        nonlocal stop_requested
+        stop_requested = True
+        if in_batch:
+            logger.info("SIGTERM received, stopping after the current batch")
+        else:
+            logger.info("SIGTERM received, stopping")
+            raise _StopServing
+
+    generator = None
+    if not args.dry_run:
+        from edi_generator.edi.generator import EDIGenerator
+        generator = EDIGenerator(settings)
+    logger.info("Serving: reading comma-separated claim IDs from stdin, one batch per line")
+
+    signal.signal(signal.SIGTERM, request_stop)
+
+    exit_code = 0
+    try:
+        for batch_number, line in enumerate(sys.stdin, start=1):
+            claim_ids = [claim_id.strip() for claim_id in line.split(",") if claim_id.strip()]
+            if not claim_ids:
+                continue
+
+            in_batch = True
+            logger.info(f"Batch {batch_number}: {len(claim_ids)} claim IDs")
+            try:
+                result = run_once(
+                    args, settings, db,
+                    generator=generator,
+                    output_suffix=f"_{batch_number}",
+                    claim_ids=claim_ids,
+                    limit=args.limit
+                )
+            except Exception as e:
+                logger.error(f"Error generating EDI for batch {batch_number}: {e}", exc_info=args.debug)
+                result = 1
+            exit_code = exit_code or result
+            in_batch = False
+
+            if stop_requested:
+                break
+    except _StopServing:
+        pass
+
+    return exit_code
+
+
 def main() -> int:
     """Main entry point for the EDI generator.
 
@@ -256,6 +445,9 @@ def main() -> int:
         print(f"✅ Interchange control number set to {args.set_interchange}")
         return 0
 
+    from edi_generator.config.settings import Settings
+    from edi_generator.database.connection import DatabaseConnection
+
     # Load configuration
     config_file = args.config if args.config else None
     settings = Settings(config_file=config_file)
@@ -285,6 +477,9 @@ def main() -> int:
         return 1
 
     try:
+        if args.serve:
+            return serve(args, settings, db)
+
         # Determine query parameters based on mode
         claim_ids = None
         client_id = None
@@ -321,12 +516,8 @@ def main() -> int:
                 return 1
             statuses = [s.strip() for s in args.statuses.split(",")]
 
-        # Query claims with optimized aggregation
-        logger.info("=" * 60)
-        logger.info("Querying claims from database...")
-        logger.info("=" * 60)
-
-        claims = db.get_claims_optimized(
+        return run_once(
+            args, settings, db,
             claim_ids=claim_ids,
             client_id=client_id,
             date_range=date_range,
@@ -334,62 +525,6 @@ def main() -> int:
             limit=limit
         )
 
-        if not claims:
-            logger.warning("No claims found matching criteria")
-            return 0
-
-        logger.info(f"Found {len(claims)} claims to process")
-
-        # Generate EDI
-        if not args.dry_run:
-            logger.info("=" * 60)
-            logger.info("Generating EDI output...")
-            logger.info("=" * 60)
-
-            generator = EDIGenerator(settings)
-            segments = generator.generate_from_claims(claims)
-
-            if args.validate_only:
-                # Just validate, don't write
-                errors = generator.validate_output(segments)
-                if errors:
-                    logger.error(f"Validation failed with {len(errors)} errors:")
-                    for error in errors[:10]:  # Show first 10 errors
-                        logger.error(f"  - {error}")
-                    return 1
-                else:
-                    logger.info("✅ EDI validation passed")
-                    logger.info(f"   Segments: {len(segments)}")
-                    return 0
-
-            # Write output file
-            output_path = args.output
-            if not output_path:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_path = f"{settings.output.output_dir}/837_db_{timestamp}.txt"
-
-            # Ensure output directory exists
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-
-            # Write EDI file (single line, no newlines)
-            with open(output_path, 'w') as f:
-                f.write(''.join(segments))
-
-            # Report statistics
-            file_size = Path(output_path).stat().st_size
-            logger.info("=" * 60)
-            logger.info(f"✅ EDI file generated: {output_path}")
-            logger.info(f"   File size: {file_size:,} bytes")
-            logger.info(f"   Segments: {len(segments)}")
-            logger.info(f"   Claims processed: {len(claims)}")
-            logger.info("=" * 60)
-
-        else:
-            logger.info("Dry run mode - no output generated")
-            logger.info(f"Would process {len(claims)} claims")
-
-        return 0
-
     except Exception as e:
         logger.error(f"Error generating EDI: {e}", exc_info=args.debug)
         return 1
@@ -9,7 +9,7 @@ import sys
 import logging
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import argparse
 
 # Add project root to path
@@ -18,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 from edi_generator.config.settings import Settings, DatabaseConfig
 from edi_generator.database.connection import DatabaseConnection
 from edi_generator.edi.generator import EDIGenerator
+from edi_generator.utils.formatters import memoize_str
 
 # Configure logging
 logging.basicConfig(
@@ -30,10 +31,28 @@ logger = logging.getLogger(__name__)
 GROUP_ID = "SLMIA"  # Default group ID for Midwestern Insurance Alliance
 DEFAULT_PORT = 27018  # Port forwarding port for production DB
 
+# Last ssno digits recorded as male
+_ODD_DIGITS = frozenset('13579')
+
+# claim_detail fields read by transform_mongo_to_claim_format; the query
+# projects to these so unused fields are never sent or decoded
+CLAIM_DETAIL_FIELDS = (
+    "_id", "claim_id", "claim_number", "subscriber_num", "status",
+    "first_name", "last_name", "date_of_injury", "ssno", "patient_address", "dob",
+    "client_name", "client_id", "client_address",
+    "pharmacy_npi", "pharmacy", "pharmacy_address", "doctor_no", "prescriber_name",
+    "trans_date", "rx_date", "rx_no", "drug_name", "ndc",
+    "quantity", "days_supply", "daw", "brand_gen",
+    "u_and_c", "plan_paid", "member_paid", "fee_schedule", "due_amount"
+)
+
 
 def convert_iso_to_yyyymmdd(iso_date: Any) -> str:
     """Convert various date formats to YYYYMMDD.
 
+    String results are cached, since claims in a billing batch share most
+    of their dates. Datetime values are formatted directly.
+
     Args:
         iso_date: Date in various formats (datetime, string ISO, or YYYYMMDD)
 
@@ -43,11 +62,17 @@ def convert_iso_to_yyyymmdd(iso_date: Any) -> str:
     if not iso_date:
         return ''
 
-    try:
-        # Handle datetime objects
-        if isinstance(iso_date, datetime):
-            return iso_date.strftime('%Y%m%d')
+    # Handle datetime objects
+    if isinstance(iso_date, datetime):
+        return iso_date.strftime('%Y%m%d')
+
+    return _convert_iso_to_yyyymmdd(iso_date)
 
+
+@memoize_str(maxsize=4096)
+def _convert_iso_to_yyyymmdd(iso_date: Any) -> str:
+    """Conversion behind convert_iso_to_yyyymmdd for non-datetime values."""
+    try:
         # Handle string dates
         iso_date_str = str(iso_date)
 
@@ -116,7 +141,7 @@ def fetch_claims_for_billing(
         collection = db_connection.db["claim_detail"]
 
         # First, check a sample document to understand the billing_date field type
-        sample = collection.find_one({"group_id": group_id})
+        sample = collection.find_one({"group_id": group_id}, {"billing_date": 1})
 
         if sample and 'billing_date' in sample:
             billing_date_value = sample['billing_date']
@@ -176,7 +201,7 @@ def fetch_claims_for_billing(
 
         # Execute the query
         logger.info(f"Executing MongoDB query: {query}")
-        claims = list(collection.find(query))
+        claims = list(collection.find(query, {field: 1 for field in CLAIM_DETAIL_FIELDS}))
 
         logger.info(f"Retrieved {len(claims)} claims for billing_date={billing_date} and group_id={group_id}")
 
@@ -197,6 +222,36 @@ def fetch_claims_for_billing(
         raise
 
 
+def _float_field(doc: Dict[str, Any], key: str) -> float:
+    """Read a numeric field as float, treating a missing, null or empty value as 0."""
+    value = doc.get(key)
+    return float(value) if value else 0.0
+
+
+def _int_field(doc: Dict[str, Any], key: str) -> int:
+    """Read a numeric field as int, treating a missing, null or empty value as 0."""
+    value = doc.get(key)
+    return int(float(value)) if value else 0
+
+
+def split_address(address: Any, default_state: str = '') -> Tuple[str, str, str]:
+    """Split a "street, city, state..." address into (address1, city, state).
+
+    Args:
+        address: Comma-separated address value from MongoDB
+        default_state: State to use when the address has no state part
+
+    Returns:
+        Tuple of (address1, city, state), with state cut to 2 characters
+    """
+    parts = str(address).split(',')
+    return (
+        parts[0] if address else '',
+        parts[1].strip() if len(parts) > 1 else '',
+        parts[2].strip()[:2] if len(parts) > 2 else default_state
+    )
+
+
 def transform_mongo_to_claim_format(mongo_doc: Dict[str, Any]) -> Dict[str, Any]:
     """Transform MongoDB document to the claim format expected by EDI generator.
 
@@ -206,67 +261,72 @@ def transform_mongo_to_claim_format(mongo_doc: Dict[str, Any]) -> Dict[str, Any]
     Returns:
         Transformed claim dictionary for EDI generation
     """
+    get = mongo_doc.get
+    claim_number = get('claim_number', '')
+    patient_address1, patient_city, patient_state = split_address(get('patient_address', ''))
+    client_address1, client_city, client_state = split_address(get('client_address', ''), 'KY')
+
     # Transform MongoDB document to match expected claim format
     claim = {
         # Main claim fields
-        'claim_id': str(mongo_doc.get('claim_id', '')),
-        'claim_number': mongo_doc.get('claim_number', ''),
-        'subscriber_num': mongo_doc.get('subscriber_num', ''),
-        'status': mongo_doc.get('status', ''),
+        'claim_id': str(get('claim_id', '')),
+        'claim_number': claim_number,
+        'subscriber_num': get('subscriber_num', ''),
+        'status': get('status', ''),
 
         # Patient data (embedded)
         'patient_data': {
-            'first_name': mongo_doc.get('first_name', ''),
-            'last_name': mongo_doc.get('last_name', ''),
-            'date_of_injury': convert_iso_to_yyyymmdd(mongo_doc.get('date_of_injury', '')),
-            'gender': 'M' if str(mongo_doc.get('ssno', '')).endswith(('1', '3', '5', '7', '9')) else 'F',
-            'address1': str(mongo_doc.get('patient_address', '')).split(',')[0] if mongo_doc.get('patient_address') else '',
-            'city': str(mongo_doc.get('patient_address', '')).split(',')[1].strip() if ',' in str(mongo_doc.get('patient_address', '')) else '',
-            'state': str(mongo_doc.get('patient_address', '')).split(',')[2].strip()[:2] if str(mongo_doc.get('patient_address', '')).count(',') >= 2 else '',
+            'first_name': get('first_name', ''),
+            'last_name': get('last_name', ''),
+            'date_of_injury': convert_iso_to_yyyymmdd(get('date_of_injury', '')),
+            'gender': 'M' if str(get('ssno', ''))[-1:] in _ODD_DIGITS else 'F',
+            'address1': patient_address1,
+            'city': patient_city,
+            'state': patient_state,
             'zip': '00000',  # Default if not available
-            'claim_number': mongo_doc.get('claim_number', ''),
-            'dob': convert_iso_to_yyyymmdd(mongo_doc.get('dob', ''))
+            'claim_number': claim_number,
+            'dob': convert_iso_to_yyyymmdd(get('dob', ''))
         },
 
         # Client data (embedded)
         'client_data': {
-            'name': mongo_doc.get('client_name', ''),
-            'client_id': str(mongo_doc.get('client_id', '')),
-            'address1': str(mongo_doc.get('client_address', '')).split(',')[0] if mongo_doc.get('client_address') else '',
-            'city': str(mongo_doc.get('client_address', '')).split(',')[1].strip() if ',' in str(mongo_doc.get('client_address', '')) else '',
-            'state': str(mongo_doc.get('client_address', '')).split(',')[2].strip()[:2] if str(mongo_doc.get('client_address', '')).count(',') >= 2 else 'KY',
+            'name': get('client_name', ''),
+            'client_id': str(get('client_id', '')),
+            'address1': client_address1,
+            'city': client_city,
+            'state': client_state,
             'zip': '40253'  # Default Louisville KY zip
         },
 
         # Pharmacy data
-        'pharmacy_npi': str(mongo_doc.get('pharmacy_npi', '')),
-        'pharmacy': mongo_doc.get('pharmacy', ''),
-        'pharmacy_address': mongo_doc.get('pharmacy_address', ''),
+        'pharmacy_npi': str(get('pharmacy_npi', '')),
+        'pharmacy': get('pharmacy', ''),
+        'pharmacy_address': get('pharmacy_address', ''),
 
         # Prescriber data
-        'doctor_no': str(mongo_doc.get('doctor_no', '')),
-        'prescriber_name': mongo_doc.get('prescriber_name', ''),
+        'doctor_no': str(get('doctor_no', '')),
+        'prescriber_name': get('prescriber_name', ''),
 
         # Prescription data
-        'trans_date': convert_iso_to_yyyymmdd(mongo_doc.get('trans_date', '')),
-        'rx_date': convert_iso_to_yyyymmdd(mongo_doc.get('rx_date', '')),
-        'rx_no': str(mongo_doc.get('rx_no', '')),
-        'drug_name': mongo_doc.get('drug_name', ''),
-        'ndc': str(mongo_doc.get('ndc', '')),
-        'quantity': float(mongo_doc.get('quantity', 0)),
-        'days_supply': int(float(mongo_doc.get('days_supply', 0))),
-        'daw': str(mongo_doc.get('daw', '0')),
-        'brand_gen': mongo_doc.get('brand_gen', 'G'),
+        'trans_date': convert_iso_to_yyyymmdd(get('trans_date', '')),
+        'rx_date': convert_iso_to_yyyymmdd(get('rx_date', '')),
+        'rx_no': str(get('rx_no', '')),
+        'drug_name': get('drug_name', ''),
+        'ndc': str(get('ndc', '')),
+        'quantity': _float_field(mongo_doc, 'quantity'),
+        'days_supply': _int_field(mongo_doc, 'days_supply'),
+        'daw': str(get('daw', '0')),
+        'brand_gen': get('brand_gen', 'G'),
 
         # Pricing
-        'u_and_c': float(mongo_doc.get('u_and_c', 0)),
-        'plan_paid': float(mongo_doc.get('plan_paid', 0)),
-        'member_paid': float(mongo_doc.get('member_paid', 0)),
-        'fee_schedule': float(mongo_doc.get('fee_schedule', 0)),
-        'due_amount': float(mongo_doc.get('due_amount', 0)),
+        'u_and_c': _float_field(mongo_doc, 'u_and_c'),
+        'plan_paid': _float_field(mongo_doc, 'plan_paid'),
+        'member_paid': _float_field(mongo_doc, 'member_paid'),
+        'fee_schedule': _float_field(mongo_doc, 'fee_schedule'),
+        'due_amount': _float_field(mongo_doc, 'due_amount'),
 
         # Additional fields
-        '_id': mongo_doc.get('_id', {})
+        '_id': get('_id', {})
     }
 
     # Add embedded NPI data (empty for now, would need lookup)
@@ -355,7 +415,6 @@ def main():
         # Generate EDI
         logger.info("Generating EDI segments...")
         generator = EDIGenerator(settings)
-        segments = generator.generate_from_claims(claims)
 
         # Create output filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -365,16 +424,15 @@ def main():
         # Ensure output directory exists
         Path(args.output_dir).mkdir(exist_ok=True)
 
-        # Write EDI file
-        with open(output_file, 'w') as f:
-            f.write(''.join(segments))
+        # Write EDI file, streaming segments as they are generated
+        segment_count = generator.write_file(claims, output_file)
 
         # Report results
         file_size = Path(output_file).stat().st_size
         logger.info("=" * 60)
         logger.info(f"✅ EDI file generated: {output_file}")
         logger.info(f"   File size: {file_size:,} bytes")
-        logger.info(f"   Segments: {len(segments)}")
+        logger.info(f"   Segments: {segment_count}")
         logger.info(f"   Claims processed: {len(claims)}")
         logger.info(f"   Billing date: {args.billing_date}")
         logger.info(f"   Group ID: {args.group_id}")
@@ -63,6 +63,9 @@ class IndexCreator:
                 # Unique constraint on claim number
                 ([("claim_number", ASCENDING)],
                  {"unique": True, "name": "idx_claim_number_unique"}),
+                # Support claim ID lookups
+                ([("claim_id", ASCENDING)],
+                 {"name": "idx_claim_id"}),
                 # Index for date range queries
                 ([("billing_date", DESCENDING)],
                  {"name": "idx_billing_date"}),
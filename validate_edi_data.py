@@ -147,25 +147,39 @@ def load_csv_data(csv_path: str):
     }
 
     with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, [])
+
+        # Resolve column positions once; a missing column reads as ''
+        columns = {name: i for i, name in enumerate(header)}
+        positions = [columns.get(name, -1) for name in (
+            'claim_number', 'last_name', 'first_name', 'rx_no', 'ndc',
+            'doctor_no', 'pharmacy_npi', 'client_name', 'trans_date'
+        )]
+
         for row in reader:
+            if not row:
+                continue  # Blank line
+            row_len = len(row)
+            (claim_number, last, first, rx_no, ndc,
+             doctor_no, pharmacy_npi, client_name, trans_date) = [
+                row[i] if 0 <= i < row_len else '' for i in positions
+            ]
+
             data['total_records'] += 1
-            data['claim_numbers'].add(row.get('claim_number', ''))
+            data['claim_numbers'].add(claim_number)
 
             # Patient name
-            last = row.get('last_name', '')
-            first = row.get('first_name', '')
             if last or first:
                 data['patient_names'].append(f"{last}, {first}")
 
-            data['rx_numbers'].add(row.get('rx_no', ''))
-            data['ndcs'].add(row.get('ndc', ''))
-            data['prescriber_npis'].add(row.get('doctor_no', ''))
-            data['pharmacy_npis'].add(row.get('pharmacy_npi', ''))
-            data['client_name'] = row.get('client_name', '')
+            data['rx_numbers'].add(rx_no)
+            data['ndcs'].add(ndc)
+            data['prescriber_npis'].add(doctor_no)
+            data['pharmacy_npis'].add(pharmacy_npi)
+            data['client_name'] = client_name
 
             # Convert date format for comparison
-            trans_date = row.get('trans_date', '')
             if trans_date and 'T' in trans_date:
                 date_part = trans_date.split('T')[0].replace('-', '')
                 data['service_dates'].add(date_part)